@@ -36,6 +36,12 @@ v3.1 CHANGELOG
 
 import os
 import re
+import io
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 import pandas as pd
 import plotly.express as px
@@ -45,6 +51,9 @@ import requests as _hub_requests
 import base64
 import json
 import streamlit.components.v1 as components
+from stat_kernel import group_reduce, sample_sd
+from oracle_pool import draw_scores, play_games, play_games_pooled, start_pool
+from sheet_source import SheetFeed
 
 
 # =============================================================================
@@ -65,6 +74,16 @@ st.markdown("""
 SHEET_ID = "1rksLYUcXQJ03uTacfIBD6SRsvtH-IE6djqT-LINwcH4"
 URL = os.environ.get("QCL_CSV_URL",
                      f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv")
+try:
+    _ROOT = os.path.dirname(os.path.abspath(__file__))
+except NameError:
+    _ROOT = os.getcwd()
+SNAPSHOT_DIR = os.path.join(_ROOT, ".qcl_cache")   # processed-frame snapshots (gitignored)
+PIPELINE_VERSION = "9"   # bump whenever load_data's math changes -> old snapshots go stale
+REFRESH_SECS = int(os.environ.get("QCL_REFRESH_SECS", "60"))   # background sheet poll interval
+HISTORY_FILES = ("SPAM_Raw_Data_v2.csv", "spam_history.csv")   # SPAM Seasons 1-6, repo root
+HISTORY_DIR = os.path.join(_ROOT, "history")                     # any further archives (*.csv)
+HISTORY_CHUNK_ROWS = int(os.environ.get("QCL_HISTORY_CHUNK_ROWS", "50000"))
 
 
 GOLD, SILVER, BRONZE = "#d4af37", "#a0a0a0", "#cd7f32"
@@ -325,275 +344,891 @@ st.markdown("""
 # =============================================================================
 # 3. DATA ENGINE
 # =============================================================================
-def basic_name_clean(raw_name):
+def basic_name_clean(names):
     """Remove pure OCR junk only: edge pipes/whitespace and [bracket]/(paren) tags.
-    Never alters casing or strips letters from the gamertag itself."""
-    if pd.isna(raw_name) or not isinstance(raw_name, str):
-        return raw_name
-    n = re.sub(r'^[|\s]+|[|\s]+$', '', raw_name)
-    n = re.sub(r'^\[.*?\]\s*|^\(.*?\)\s*', '', n)
-    return n.strip()
+    Never alters casing or strips letters from the gamertag itself.
+    Vectorized over a Series; non-string values pass through untouched."""
+    if not (pd.api.types.is_object_dtype(names) or pd.api.types.is_string_dtype(names)):
+        return names
+    out = (names.str.replace(r'^[|\s]+|[|\s]+$', '', regex=True)
+                .str.replace(r'^\[.*?\]\s*|^\(.*?\)\s*', '', regex=True)
+                .str.strip())
+    return out.where(out.notna(), names)
 
 
 
 
-def name_match_key(name):
+def name_match_key(names):
     """OCR-tolerant identity key: strips leading I/l/| prefix runs (2K clan-tag
     misreads), folds l<->i confusion, case-insensitive. Grouping only — display
-    names are never modified by this."""
-    k = re.sub(r'^[|Il\s]+', '', str(name))
-    return k.strip().lower().replace('l', 'i').replace(' ', '')
+    names are never modified by this. Vectorized over a Series."""
+    return (names.astype(str).str.replace(r'^[|Il\s]+', '', regex=True)
+                 .str.strip().str.lower()
+                 .str.replace('l', 'i', regex=False).str.replace(' ', '', regex=False))
 
 
 
 
-@st.cache_data(ttl=60, show_spinner="Pulling the league sheet...")
-def load_data():
+ALIAS_PATH = os.path.join(SNAPSHOT_DIR, "name_aliases.json")
+
+
+
+
+def _alias_load():
+    """Persisted alias table: raw tag -> [clean tag, match key], plus key -> canonical tag."""
     try:
-        df = pd.read_csv(URL)
-        df.columns = df.columns.str.strip()
+        with open(ALIAS_PATH, "r", encoding="utf-8") as fh:
+            t = json.load(fh)
+        if t.get('version') == PIPELINE_VERSION:
+            return t
+    except Exception:
+        pass
+    return {'version': PIPELINE_VERSION, 'raw': {}, 'canonical': {}}
+
+
+
+
+def _alias_save(table):
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(ALIAS_PATH + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(table, fh, ensure_ascii=False)
+        os.replace(ALIAS_PATH + ".tmp", ALIAS_PATH)
+    except Exception:
+        pass   # unsaved aliases just get re-derived next ingest
+
+
+
+
+def _read_source(src):
+    """Raw bytes of the league sheet — http(s) URL or a local CSV path."""
+    if re.match(r'^https?://', str(src)):
+        r = _hub_requests.get(src, timeout=20)
+        r.raise_for_status()
+        return r.content
+    with open(src, "rb") as fh:
+        return fh.read()
+
+
+
+
+def _history_paths():
+    """Every SPAM history CSV present: the two known names, then history/*.csv."""
+    paths = [os.path.join(_ROOT, n) for n in HISTORY_FILES]
+    if os.path.isdir(HISTORY_DIR):
+        paths += [os.path.join(HISTORY_DIR, n) for n in sorted(os.listdir(HISTORY_DIR))
+                  if n.lower().endswith(".csv")]
+    return [p for p in paths if os.path.isfile(p)]
+
+
+
+
+_DIGESTS = {}   # (path, mtime_ns, size) -> sha256; history is hashed once per file version
+
+
+
+
+def _file_digest(path):
+    """sha256 of a file, streamed in 1 MiB blocks (never read whole)."""
+    info = os.stat(path)
+    stamp = (path, info.st_mtime_ns, info.st_size)
+    if stamp not in _DIGESTS:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        _DIGESTS[stamp] = h.hexdigest()
+    return _DIGESTS[stamp]
+
+
 
 
-        # --- merge SPAM history (Seasons 1-6) if the CSV is in the repo ---
+def _history_manifest():
+    """[(path, digest)] for every readable history file, in load order."""
+    out = []
+    for path in _history_paths():
         try:
-            _root = os.path.dirname(os.path.abspath(__file__))
-        except NameError:
-            _root = os.getcwd()
-        for _spam_name in ("SPAM_Raw_Data_v2.csv", "spam_history.csv"):
-            _sp_path = os.path.join(_root, _spam_name)
-            if os.path.exists(_sp_path):
-                try:
-                    _sp = pd.read_csv(_sp_path)
-                    _sp.columns = _sp.columns.str.strip()
-                    # namespace SPAM seasons -> 101..106 so they never collide with QCL 1..6
-                    _sp["Season"] = pd.to_numeric(_sp.get("Season"), errors="coerce") + 100
-                    _sp = _sp[_sp["Season"].notna()]
-                    df = pd.concat([df, _sp], ignore_index=True)
-                except Exception:
-                    pass
-                break
-        health = {}
-        df = df[df['Player/Team'] != 'Player/Team']
-        df = df[df['Team Name'].notna()
-                & (df['Team Name'].astype(str).str.strip() != '')
-                & (df['Team Name'].astype(str) != '0')]
-        health['Rows loaded'] = len(df)
+            out.append((path, _file_digest(path)))
+        except OSError:
+            pass
+    return out
 
 
-        # --- TYPE NORMALIZATION ---
-        raw_type = df['Type'].astype(str).str.strip().str.lower()
-        total_name = df['Player/Team'].astype(str).str.strip().str.upper().isin(['TOTAL', 'TOTALS', 'TEAM TOTAL'])
-        is_team_row = raw_type.isin(['team', 'total', 'team total', 'totals']) | total_name
-        health['Players recovered (bad Type)'] = int((~is_team_row & (raw_type != 'player')).sum())
-        df['Type'] = np.where(is_team_row, 'Team', 'Player')
 
 
-        # --- CANONICAL NAMES ---
-        df['Player/Team'] = df['Player/Team'].apply(basic_name_clean)
-        p_names = df.loc[df['Type'] == 'Player', 'Player/Team'].dropna()
-        counts = p_names.value_counts()
-        canon = {}
-        for name, cnt in counts.items():
-            k = name_match_key(name)
-            if k not in canon or cnt > canon[k][1]:
-                canon[k] = (name, cnt)
-
-
-        def to_canonical(n):
-            if not isinstance(n, str):
-                return n
-            hit = canon.get(name_match_key(n))
-            return hit[0] if hit else n
-
-
-        df.loc[df['Type'] == 'Player', 'Player/Team'] = df.loc[df['Type'] == 'Player', 'Player/Team'].map(to_canonical)
-        health['Name variants unified'] = int(sum(1 for n in counts.index if canon[name_match_key(n)][0] != n))
-
+def _ingest_key(sheet_raw, history):
+    """Content hash of everything load_data reads (+ pipeline version)."""
+    h = hashlib.sha256(PIPELINE_VERSION.encode())
+    h.update(hashlib.sha256(sheet_raw).digest())
+    for _, digest in history:
+        h.update(digest.encode())
+    return h.hexdigest()[:24]
 
-        req_cols = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FOULS', 'TO', 'FGA', 'FGM', '3PM', '3PA',
-                    'FTA', 'FTM', 'OREB', 'DREB', 'MIN', 'Q1', 'Q2', 'Q3', 'Q4',
-                    'Game_ID', 'Win', 'Season', 'Type', 'Team Name']
-        for c in req_cols:
-            if c not in df.columns:
-                df[c] = 0
-            if c not in ['Type', 'Team Name', 'Player/Team', 'Win']:
-                df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
 
 
-        df['Win'] = pd.to_numeric(df['Win'], errors='coerce')   # keep NaN; derived from score later
-        df['Game_ID'] = pd.to_numeric(df['Game_ID'], errors='coerce')
-
 
-        # --- DROP rows with no game/season identity; cross-season-safe game key ---
-        pre = len(df)
-        df = df[df['Game_ID'].notna() & (df['Season'] > 0)]
-        health['Rows dropped (no Game_ID/Season)'] = pre - len(df)
-        df['GKey'] = df['Season'].astype(int).astype(str) + '-' + df['Game_ID'].astype(int).astype(str)
-        df['Era'] = np.where(df['Season'] >= 100, 'SPAM', 'QCL')
-
-
-        # --- DEDUPE double-entered rows (keep the fuller stat line) ---
-        pre = len(df)
-        df['_bulk'] = df['PTS'] + df['FGA'] + df['REB']
-        df = (df.sort_values('_bulk')
-                .drop_duplicates(subset=['Season', 'Game_ID', 'Team Name', 'Player/Team', 'Type'], keep='last')
-                .drop(columns='_bulk')
-                .sort_index())
-        health['Duplicate rows removed'] = pre - len(df)
-
-
-        df['PIE_Raw'] = (df['PTS'] + df['REB'] + df['AST'] + df['STL'] + df['BLK']) - (df['FGA'] * 0.5) - df['TO']
-        df['Poss_Raw'] = df['FGA'] + 0.44 * df['FTA'] + df['TO']
-
-
-        # --- HOLLINGER GAME SCORE (0.42*REB fallback when OREB/DREB not tracked) ---
-        reb_term = np.where((df['OREB'] + df['DREB']) > 0,
-                            0.7 * df['OREB'] + 0.3 * df['DREB'],
-                            0.42 * df['REB'])
-        df['Game_Score'] = (df['PTS'] + 0.4 * df['FGM'] - 0.7 * df['FGA'] - 0.4 * (df['FTA'] - df['FTM'])
-                            + reb_term + df['STL'] + 0.7 * df['AST'] + 0.7 * df['BLK']
-                            - 0.4 * df['FOULS'] - df['TO'])
-
-
-        # --- TEAM TOTALS: recorded preferred; rebuilt from players as fallback ---
-        key = ['Season', 'Game_ID', 'Team Name']
-        players = df[df['Type'] == 'Player'].copy()
-        recorded = df[df['Type'] == 'Team'].copy()
-        recorded = recorded[recorded['PTS'] > 0].drop_duplicates(subset=key, keep='last')
-
-
-        sum_cols = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FOULS', 'TO', 'FGA', 'FGM', '3PM', '3PA',
-                    'FTA', 'FTM', 'OREB', 'DREB', 'Q1', 'Q2', 'Q3', 'Q4',
-                    'Poss_Raw', 'PIE_Raw', 'Game_Score']
-        rebuilt = players.groupby(key).agg({**{c: 'sum' for c in sum_cols},
-                                            'Win': 'max', 'GKey': 'first'}).reset_index()
-        rebuilt = rebuilt.merge(recorded[key].assign(_rec=1), on=key, how='left')
-        rebuilt = rebuilt[rebuilt['_rec'].isna()].drop(columns=['_rec'])
-
-
-        team_rows = pd.concat([recorded, rebuilt], ignore_index=True)
-        team_rows['Type'] = 'Team'
-        team_rows['Player/Team'] = team_rows['Team Name'].astype(str) + " TOTALS"
-        health['Team totals (recorded / rebuilt)'] = f"{len(recorded)} / {len(rebuilt)}"
-
-
-        # --- COVERAGE & CONSISTENCY ---
-        q_sum = team_rows[['Q1', 'Q2', 'Q3', 'Q4']].sum(axis=1)
-        has_q = q_sum > 0
-        health['Quarter data coverage'] = f"{int(has_q.sum())}/{len(team_rows)} team-games"
-        q_mismatch = int((has_q & (q_sum != team_rows['PTS'])).sum())
-        if q_mismatch:
-            health['⚠️ Quarters ≠ PTS'] = q_mismatch
-        reb_split = df[df['Type'] == 'Player'][['OREB', 'DREB']].sum(axis=1) > 0
-        health['OREB/DREB coverage'] = f"{int(reb_split.sum())}/{int((df['Type'] == 'Player').sum())} player rows"
-        ft_cov = int((df.loc[df['Type'] == 'Player', 'FTA'] > 0).sum())
-        health['FTA coverage'] = f"{ft_cov}/{int((df['Type'] == 'Player').sum())} player rows"
-
-
-        # --- WIN RECONCILIATION: fill missing Win from head-to-head score ---
-        n_teams = team_rows.groupby(['Season', 'Game_ID'])['Team Name'].transform('nunique')
-        max_pts = team_rows.groupby(['Season', 'Game_ID'])['PTS'].transform('max')
-        min_pts = team_rows.groupby(['Season', 'Game_ID'])['PTS'].transform('min')
-        derived = pd.Series(np.where((n_teams == 2) & (max_pts != min_pts),
-                                     (team_rows['PTS'] == max_pts).astype(float), np.nan),
-                            index=team_rows.index)
-        health['Wins derived from score'] = int((team_rows['Win'].isna() & derived.notna()).sum())
-        team_rows['Win'] = team_rows['Win'].fillna(derived)
-
-
-        win_map = team_rows.set_index(key)['Win']
-        mapped = players.set_index(key).index.map(win_map)
-        players['Win'] = players['Win'].fillna(pd.Series(mapped, index=players.index))
-        df = pd.concat([players, team_rows], ignore_index=True)
-        df['Win'] = pd.to_numeric(df['Win'], errors='coerce').fillna(0).apply(lambda x: 1 if x > 0 else 0)
-
-
-        # --- ADVANCED RATINGS (PER GAME) ---
-        p_mask = df['Type'].astype(str).str.lower() == 'player'
-        team_poss = df[p_mask].groupby(['Season', 'Game_ID', 'Team Name'])['Poss_Raw'].transform('sum')
-        df.loc[p_mask, 'USG_Game'] = np.where(team_poss > 0, df.loc[p_mask, 'Poss_Raw'] / team_poss * 100, 0)
-        df['USG_Game'] = pd.to_numeric(df.get('USG_Game'), errors='coerce').fillna(0)
-        df['ORtg_Game'] = np.where(df['Poss_Raw'] > 0, df['PTS'] / df['Poss_Raw'] * 100, 0)
-
-
-        # --- PROXY STATS ---
-        df['Game_Type'] = np.where(df['Game_ID'] >= 9000, 'Playoffs',
-                                   np.where(df['Game_ID'] >= 8000, 'Tournament', 'Regular Season'))
-        players_df = df[df['Type'].astype(str).str.lower() == 'player'].copy()
-        players_df = players_df.sort_values(by=['Season', 'Game_ID', 'Team Name'])
-        players_df['Position_Num'] = players_df.groupby(['Season', 'Game_ID', 'Team Name']).cumcount() + 1
-
-
-        players_df['Tipped_Passes'] = np.where(players_df['Position_Num'] <= 2,
-                                               (players_df['STL'] * 2.2) + (players_df['FOULS'] * 0.4),
-                                               (players_df['STL'] * 1.2) + (players_df['BLK'] * 0.2)
-                                               ).round().astype(int)
-        players_df['Shots_Affected'] = np.where(players_df['Position_Num'] >= 3,
-                                                (players_df['BLK'] * 3.0) + (players_df['REB'] * 0.4) + (players_df['FOULS'] * 0.5),
-                                                (players_df['BLK'] * 1.5) + (players_df['STL'] * 0.4)
-                                                ).round().astype(int)
-        players_df['FB_Points'] = np.where(players_df['Position_Num'] <= 2,
-                                           (players_df['STL'] * 2.0) + (players_df['FGM'] * 0.4),
-                                           (players_df['STL'] * 1.0) + (players_df['FGM'] * 0.1)
-                                           ).round().astype(int)
-        players_df['FB_Points'] = players_df[['FB_Points', 'PTS']].min(axis=1)
+def _snapshot_paths(key):
+    return (os.path.join(SNAPSHOT_DIR, f"league_{key}.parquet"),
+            os.path.join(SNAPSHOT_DIR, f"league_{key}.json"))
+
+
+
+
+def _snapshot_read(key):
+    """Finished {'df','dims','blocks','index','dq','health','timings','memory'} for this ingest key, or None on a miss / no pyarrow."""
+    frame_path, meta_path = _snapshot_paths(key)
+    if not (os.path.exists(frame_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        df = pd.read_parquet(frame_path)
+        dims = league_dims(df)
+        return {'df': df, 'dims': dims, 'blocks': season_blocks(df, dims), 'index': row_indexes(df),
+                'health': meta.get('health', {}),
+                'dq': {k: np.asarray(v, dtype=np.int64) for k, v in meta.get('dq', {}).items()},
+                'timings': meta.get('timings', []), 'memory': meta.get('memory', {})}
+    except Exception:
+        return None
+
+
+
+
+def _snapshot_write(key, payload, keep=3):
+    """Persist a processed frame; atomic rename, keeps only the newest `keep` snapshots."""
+    frame_path, meta_path = _snapshot_paths(key)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        payload['df'].to_parquet(frame_path + ".tmp", index=False)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump({'key': key, 'health': payload['health'],
+                       'timings': payload.get('timings', []),
+                       'memory': payload.get('memory', {}),
+                       'dq': {k: v.tolist() for k, v in payload.get('dq', {}).items()}}, fh, indent=2,
+                      default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+        os.replace(frame_path + ".tmp", frame_path)
+        os.replace(meta_path + ".tmp", meta_path)
+        old = sorted((f for f in os.listdir(SNAPSHOT_DIR)
+                      if f.startswith("league_") and f.endswith(".parquet")),
+                     key=lambda f: os.path.getmtime(os.path.join(SNAPSHOT_DIR, f)), reverse=True)
+        for f in old[keep:]:
+            for stale in _snapshot_paths(f[len("league_"):-len(".parquet")]):
+                if os.path.exists(stale):
+                    os.remove(stale)
+    except Exception:
+        pass   # a cache that can't be written is just a cache miss next time
+
+
+
+
+def _league_build(sheet_raw, key, cache):
+    """SheetFeed's build step: None if sheet + history still hash to `key`, else (new key,
+    snapshot), read back from disk when this content was built before."""
+    history = _history_manifest()
+    new_key = _ingest_key(sheet_raw, history)
+    if new_key == key:
+        return None
+    out = _snapshot_read(new_key)
+    if out is None:
+        out = build_league(sheet_raw, history, cache=cache)
+        _snapshot_write(new_key, out)
+    return new_key, out
+
+
+
+
+@st.cache_resource(show_spinner=False)
+def _league_feed():
+    return SheetFeed(URL, _league_build, REFRESH_SECS)
+
+
+
+
+def load_data():
+    """Current league snapshot from the shared feed, or an error string."""
+    feed = _league_feed()
+    if feed._snap is None:
+        with st.spinner("Pulling the league sheet..."):
+            snap = feed.snapshot()
+    else:
+        snap = feed.snapshot()
+    return snap if snap is not None else (feed.last_error or "League sheet unavailable.")
+
+
 
 
-        df = df.merge(players_df[['Season', 'Game_ID', 'Team Name', 'Player/Team',
-                                  'Tipped_Passes', 'Shots_Affected', 'FB_Points', 'Position_Num']],
-                      on=['Season', 'Game_ID', 'Team Name', 'Player/Team'], how='left')
-        for c in ['Tipped_Passes', 'Shots_Affected', 'FB_Points', 'Position_Num']:
+# ---- INGEST STAGES ----------------------------------------------------------
+# Each stage is frame -> (frame, health counters). The live sheet and the SPAM
+# history run as two independent chains (their seasons never overlap), joined only
+# by the canonical-name stage, so a change to one source re-runs only its chain.
+# Stage results are cached on (stage, input fingerprint) by run_stage(), so a stage
+# must not write into its input. A stage that only adds or replaces whole columns starts
+# from df.copy(deep=False) (the other columns stay shared); one that writes into a filtered
+# frame or a slice of an existing column copies it first.
+def _stage_read(raw):
+    df = pd.read_csv(io.BytesIO(raw))
+    df.columns = df.columns.str.strip()
+    return df, {}
+
+
+
+
+def _game_codes(df):
+    """int64 code per row for its (Season, Game_ID): Season * 2**32 + Game_ID, -1 if either is missing."""
+    num = lambda c: pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) if c in df else np.full(len(df), np.nan)
+    season, game = num('Season'), num('Game_ID')
+    ok = ~(np.isnan(season) | np.isnan(game))
+    return np.where(ok, np.where(ok, season, 0).astype(np.int64) * 2**32 + np.where(ok, game, 0).astype(np.int64), -1)
+
+
+NO_GAMES = pd.Index(np.empty(0, dtype=np.int64))
+
+
+
+
+def _stage_read_history(path, claimed=NO_GAMES):
+    """Stream one history CSV in HISTORY_CHUNK_ROWS chunks straight from disk. Games in
+    `claimed` (an Index of _game_codes, loaded from an earlier history file) are skipped,
+    so a re-export sitting next to the original never double-counts. Chunking bounds the
+    parser's buffer, not the result: the kept chunks are joined into one frame, because
+    game logs, box scores and the record book read history rows like sheet rows."""
+    kept, chunks, skipped = [], 0, 0
+    for chunk in pd.read_csv(path, chunksize=HISTORY_CHUNK_ROWS):
+        chunks += 1
+        chunk.columns = chunk.columns.str.strip()
+        # namespace SPAM seasons -> 101..106 so they never collide with QCL 1..6
+        chunk["Season"] = pd.to_numeric(chunk.get("Season"), errors="coerce") + 100
+        chunk = chunk[chunk["Season"].notna()]
+        if len(claimed) and len(chunk):
+            dup = claimed.get_indexer(_game_codes(chunk)) >= 0
+            skipped += int(dup.sum())
+            chunk = chunk[~dup]
+        kept.append(chunk)
+    df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame()
+    return df, {'History files / chunks': (1, chunks), '⚠️ History rows already loaded': skipped}
+
+
+
+
+def _stage_types(df):
+    df = df[df['Player/Team'] != 'Player/Team']
+    df = df[df['Team Name'].notna()
+            & (df['Team Name'].astype(str).str.strip() != '')
+            & (df['Team Name'].astype(str) != '0')].copy()
+    raw_type = df['Type'].astype(str).str.strip().str.lower()
+    total_name = df['Player/Team'].astype(str).str.strip().str.upper().isin(['TOTAL', 'TOTALS', 'TEAM TOTAL'])
+    is_team_row = raw_type.isin(['team', 'total', 'team total', 'totals']) | total_name
+    df['Type'] = np.where(is_team_row, 'Team', 'Player')
+    return df, {'Rows loaded': len(df),
+                'Players recovered (bad Type)': int((~is_team_row & (raw_type != 'player')).sum())}
+
+
+
+
+def _stage_names(frames):
+    """Cross-source: one canonical spelling per OCR identity key, across every source.
+    Also aligns every source to the union of columns (a column one source lacks is NaN, not 0).
+    Only tags missing from the persisted alias table are cleaned/keyed; canonical = the
+    most-entered spelling per key."""
+    cols = list(dict.fromkeys(c for f in frames for c in f.columns))
+    frames = [f.reindex(columns=cols) for f in frames]
+    table = _alias_load()
+    raw = pd.concat([f['Player/Team'] for f in frames], ignore_index=True)
+    if pd.api.types.is_object_dtype(raw) or pd.api.types.is_string_dtype(raw):
+        raw = raw[raw.str.len().notna()]   # strings only — NaN / numbers are never aliased
+    else:
+        raw = raw.iloc[:0]
+    unseen = pd.Series(raw[~raw.isin(list(table['raw']))].unique(), dtype=object)
+    if len(unseen):
+        clean = basic_name_clean(unseen)
+        table['raw'].update(zip(unseen, zip(clean, name_match_key(clean))))
+    lookup = pd.DataFrame.from_dict(table['raw'], orient='index', columns=['clean', 'key'])
+
+
+    for f in frames:
+        tag = f['Player/Team']
+        f['Player/Team'] = tag.map(lookup['clean']).where(tag.isin(lookup.index), tag)
+    p_names = pd.concat([f.loc[f['Type'] == 'Player', 'Player/Team'] for f in frames]).dropna()
+    counts = p_names.value_counts()
+    alias = pd.DataFrame({'key': name_match_key(counts.index.to_series())}, index=counts.index)
+    canon = alias.drop_duplicates('key').reset_index().set_index('key').iloc[:, 0]   # value_counts order
+    alias['canonical'] = alias['key'].map(canon)
+    for f in frames:
+        is_p = f['Type'] == 'Player'
+        f.loc[is_p, 'Player/Team'] = f.loc[is_p, 'Player/Team'].map(alias['canonical'])
+
+
+    changed = table['canonical'] != canon.to_dict()
+    table['canonical'] = canon.to_dict()
+    if len(unseen) or changed:
+        _alias_save(table)
+    return frames, {'Name variants unified': int((alias.index != alias['canonical']).sum())}
+
+
+
+
+def _stage_numerics(df):
+    df = df.copy(deep=False)
+    req_cols = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FOULS', 'TO', 'FGA', 'FGM', '3PM', '3PA',
+                'FTA', 'FTM', 'OREB', 'DREB', 'MIN', 'Q1', 'Q2', 'Q3', 'Q4',
+                'Game_ID', 'Win', 'Season', 'Type', 'Team Name']
+    for c in req_cols:
+        if c not in df.columns:
+            df[c] = 0
+        if c not in ['Type', 'Team Name', 'Player/Team', 'Win']:
             df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
 
 
-        t_proxy = (df[df['Type'] == 'Player']
-                   .groupby(['Season', 'Game_ID', 'Team Name'])[['Tipped_Passes', 'Shots_Affected', 'FB_Points']]
-                   .sum().reset_index())
-        for col in ['Tipped_Passes', 'Shots_Affected', 'FB_Points']:
-            df.loc[df['Type'] == 'Team', col] = (df.loc[df['Type'] == 'Team']
-                                                 .set_index(['Season', 'Game_ID', 'Team Name']).index
-                                                 .map(t_proxy.set_index(['Season', 'Game_ID', 'Team Name'])[col])
-                                                 ).fillna(0)
-
-
-        # --- MATCHUP LOGIC & SOS ---
-        t_logs = df[df['Type'] == 'Team'][['Game_ID', 'Team Name', 'PTS', 'FGM', 'FGA', '3PM', '3PA',
-                                           'TO', 'FTA', 'Win', 'Season']].copy()
-        t_logs['Team_Win_Pct'] = t_logs.groupby(['Season', 'Team Name'])['Win'].transform('mean')
-
-
-        n_in_game = t_logs.groupby(['Season', 'Game_ID'])['Team Name'].transform('nunique')
-        pairable = t_logs[n_in_game == 2]
-        opps = pd.merge(pairable, pairable, on=['Season', 'Game_ID'], suffixes=('', '_Opp'))
-        opps = opps[opps['Team Name'] != opps['Team Name_Opp']]
-        opps = opps.drop_duplicates(subset=['Season', 'Game_ID', 'Team Name'])
-
-
-        if not opps.empty:
-            opps['Point_Diff'] = opps['PTS'] - opps['PTS_Opp']
-            opps['Opp_Possessions'] = opps['FGA_Opp'] + (0.44 * opps['FTA_Opp']) + opps['TO_Opp']
-            opps['Opp_PPP'] = np.where(opps['Opp_Possessions'] > 0, opps['PTS_Opp'] / opps['Opp_Possessions'], 0)
-            opps['Opp_FG%'] = np.where(opps['FGA_Opp'] > 0, (opps['FGM_Opp'] / opps['FGA_Opp']) * 100, 0)
-            df = pd.merge(df, opps[['Season', 'Game_ID', 'Team Name', 'Point_Diff', 'Opp_PPP', 'Opp_FG%',
-                                    'Team Name_Opp', 'Team_Win_Pct_Opp', 'PTS_Opp']],
-                          on=['Season', 'Game_ID', 'Team Name'], how='left')
-            for src, dst in [('Point_Diff', 'Point_Diff'), ('Opp_PPP', 'Opp_PPP'),
-                             ('Team_Win_Pct_Opp', 'SOS_Game'), ('Team Name_Opp', 'Opp_Name'),
-                             ('PTS_Opp', 'Opp_PTS')]:
-                df[dst] = df.groupby(['Season', 'Game_ID', 'Team Name'])[src].transform('first')
-        else:
-            # No pairable head-to-head games at all — still guarantee columns exist.
-            df['Point_Diff'] = 0.0
-            df['Opp_PPP'] = np.nan
-            df['Opp_FG%'] = np.nan
-            df['SOS_Game'] = np.nan
-            df['Opp_Name'] = None
-            df['Opp_PTS'] = np.nan
+    df['Win'] = pd.to_numeric(df['Win'], errors='coerce')   # keep NaN; derived from score later
+    df['Game_ID'] = pd.to_numeric(df['Game_ID'], errors='coerce')
+
+
+    # --- DROP rows with no game/season identity; cross-season-safe game key ---
+    pre = len(df)
+    df = df[df['Game_ID'].notna() & (df['Season'] > 0)].copy()
+    df['GKey'] = df['Season'].astype(int).astype(str) + '-' + df['Game_ID'].astype(int).astype(str)
+    df['Era'] = np.where(df['Season'] >= 100, 'SPAM', 'QCL')
+    return df, {'Rows dropped (no Game_ID/Season)': pre - len(df)}
+
+
+
+
+def _stage_dedupe(df):
+    """Double-entered rows: keep the fuller stat line (ties -> the later entry)."""
+    pre = len(df)
+    df = df.assign(_bulk=df['PTS'] + df['FGA'] + df['REB'])
+    df = (df.sort_values('_bulk', kind='stable')
+            .drop_duplicates(subset=['Season', 'Game_ID', 'Team Name', 'Player/Team', 'Type'], keep='last')
+            .drop(columns='_bulk')
+            .sort_index())
+    return df, {'Duplicate rows removed': pre - len(df)}
+
+
+
+
+def _stage_game_score(df):
+    df = df.copy(deep=False)
+    df['PIE_Raw'] = (df['PTS'] + df['REB'] + df['AST'] + df['STL'] + df['BLK']) - (df['FGA'] * 0.5) - df['TO']
+    df['Poss_Raw'] = df['FGA'] + 0.44 * df['FTA'] + df['TO']
+
+
+    # --- HOLLINGER GAME SCORE (0.42*REB fallback when OREB/DREB not tracked) ---
+    reb_term = np.where((df['OREB'] + df['DREB']) > 0,
+                        0.7 * df['OREB'] + 0.3 * df['DREB'],
+                        0.42 * df['REB'])
+    df['Game_Score'] = (df['PTS'] + 0.4 * df['FGM'] - 0.7 * df['FGA'] - 0.4 * (df['FTA'] - df['FTM'])
+                        + reb_term + df['STL'] + 0.7 * df['AST'] + 0.7 * df['BLK']
+                        - 0.4 * df['FOULS'] - df['TO'])
+    return df, {}
+
+
+
+
+def _stage_team_totals(df):
+    """Recorded team totals preferred; rebuilt from player rows as fallback.
+    Output = player rows, then team rows."""
+    key = ['Season', 'Game_ID', 'Team Name']
+    players = df[df['Type'] == 'Player']
+    recorded = df[df['Type'] == 'Team']
+    recorded = recorded[recorded['PTS'] > 0].drop_duplicates(subset=key, keep='last')
+
+
+    sum_cols = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FOULS', 'TO', 'FGA', 'FGM', '3PM', '3PA',
+                'FTA', 'FTM', 'OREB', 'DREB', 'Q1', 'Q2', 'Q3', 'Q4',
+                'Poss_Raw', 'PIE_Raw', 'Game_Score']
+    rebuilt = players.groupby(key).agg({**{c: 'sum' for c in sum_cols},
+                                        'Win': 'max', 'GKey': 'first', 'Era': 'first'}).reset_index()
+    rebuilt = rebuilt.merge(recorded[key].assign(_rec=1), on=key, how='left')
+    rebuilt = rebuilt[rebuilt['_rec'].isna()].drop(columns=['_rec'])
+
+
+    team_rows = pd.concat([recorded, rebuilt], ignore_index=True)
+    team_rows['Type'] = 'Team'
+    team_rows['Player/Team'] = team_rows['Team Name'].astype(str) + " TOTALS"
+
+
+    # --- COVERAGE & CONSISTENCY ---
+    q_sum = team_rows[['Q1', 'Q2', 'Q3', 'Q4']].sum(axis=1)
+    has_q = q_sum > 0
+    n_players = int((df['Type'] == 'Player').sum())
+    health = {'Team totals (recorded / rebuilt)': (len(recorded), len(rebuilt)),
+              'Quarter data coverage': (int(has_q.sum()), len(team_rows)),
+              'OREB/DREB coverage': (int((players[['OREB', 'DREB']].sum(axis=1) > 0).sum()), n_players),
+              'FTA coverage': (int((players['FTA'] > 0).sum()), n_players)}
+    return pd.concat([players, team_rows], ignore_index=True), health
+
+
+
+
+def _stage_wins(df):
+    """Fill missing Win from the head-to-head score, then push it down to player rows."""
+    key = ['Season', 'Game_ID', 'Team Name']
+    players = df[df['Type'] == 'Player'].copy()
+    team_rows = df[df['Type'] == 'Team'].copy()
+    n_teams = team_rows.groupby(['Season', 'Game_ID'])['Team Name'].transform('nunique')
+    max_pts = team_rows.groupby(['Season', 'Game_ID'])['PTS'].transform('max')
+    min_pts = team_rows.groupby(['Season', 'Game_ID'])['PTS'].transform('min')
+    derived = pd.Series(np.where((n_teams == 2) & (max_pts != min_pts),
+                                 (team_rows['PTS'] == max_pts).astype(float), np.nan),
+                        index=team_rows.index)
+    health = {'Wins derived from score': int((team_rows['Win'].isna() & derived.notna()).sum())}
+    team_rows['Win'] = team_rows['Win'].fillna(derived)
+
+
+    win_map = team_rows.set_index(key)['Win']
+    mapped = players.set_index(key).index.map(win_map)
+    players['Win'] = players['Win'].fillna(pd.Series(mapped, index=players.index))
+    df = pd.concat([players, team_rows], ignore_index=True)
+    df['Win'] = pd.to_numeric(df['Win'], errors='coerce').fillna(0).apply(lambda x: 1 if x > 0 else 0)
+    return df, health
+
+
+
+
+def _stage_ratings(df):
+    """Per-game USG / ORtg, plus the Game_Type split by Game_ID range."""
+    df = df.copy(deep=False)
+    p_mask = df['Type'].astype(str).str.lower() == 'player'
+    team_poss = df[p_mask].groupby(['Season', 'Game_ID', 'Team Name'])['Poss_Raw'].transform('sum')
+    usg = pd.Series(np.where(team_poss > 0, df.loc[p_mask, 'Poss_Raw'] / team_poss * 100, 0), index=team_poss.index)
+    prior = pd.to_numeric(df['USG_Game'], errors='coerce') if 'USG_Game' in df else np.nan
+    df['USG_Game'] = usg.reindex(df.index).where(p_mask, prior).fillna(0)   # whole column: the input's stays as it was
+    df['ORtg_Game'] = np.where(df['Poss_Raw'] > 0, df['PTS'] / df['Poss_Raw'] * 100, 0)
+    df['Game_Type'] = np.where(df['Game_ID'] >= 9000, 'Playoffs',
+                               np.where(df['Game_ID'] >= 8000, 'Tournament', 'Regular Season'))
+    return df, {}
+
+
+
+
+def _stage_proxy(df):
+    players_df = df[df['Type'].astype(str).str.lower() == 'player']
+    players_df = players_df.sort_values(by=['Season', 'Game_ID', 'Team Name'])
+    players_df['Position_Num'] = players_df.groupby(['Season', 'Game_ID', 'Team Name']).cumcount() + 1
+
+
+    players_df['Tipped_Passes'] = np.where(players_df['Position_Num'] <= 2,
+                                           (players_df['STL'] * 2.2) + (players_df['FOULS'] * 0.4),
+                                           (players_df['STL'] * 1.2) + (players_df['BLK'] * 0.2)
+                                           ).round().astype(int)
+    players_df['Shots_Affected'] = np.where(players_df['Position_Num'] >= 3,
+                                            (players_df['BLK'] * 3.0) + (players_df['REB'] * 0.4) + (players_df['FOULS'] * 0.5),
+                                            (players_df['BLK'] * 1.5) + (players_df['STL'] * 0.4)
+                                            ).round().astype(int)
+    players_df['FB_Points'] = np.where(players_df['Position_Num'] <= 2,
+                                       (players_df['STL'] * 2.0) + (players_df['FGM'] * 0.4),
+                                       (players_df['STL'] * 1.0) + (players_df['FGM'] * 0.1)
+                                       ).round().astype(int)
+    players_df['FB_Points'] = players_df[['FB_Points', 'PTS']].min(axis=1)
+
+
+    df = df.merge(players_df[['Season', 'Game_ID', 'Team Name', 'Player/Team',
+                              'Tipped_Passes', 'Shots_Affected', 'FB_Points', 'Position_Num']],
+                  on=['Season', 'Game_ID', 'Team Name', 'Player/Team'], how='left')
+    for c in ['Tipped_Passes', 'Shots_Affected', 'FB_Points', 'Position_Num']:
+        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
+
+
+    t_proxy = (df[df['Type'] == 'Player']
+               .groupby(['Season', 'Game_ID', 'Team Name'])[['Tipped_Passes', 'Shots_Affected', 'FB_Points']]
+               .sum().reset_index())
+    for col in ['Tipped_Passes', 'Shots_Affected', 'FB_Points']:
+        df.loc[df['Type'] == 'Team', col] = (df.loc[df['Type'] == 'Team']
+                                             .set_index(['Season', 'Game_ID', 'Team Name']).index
+                                             .map(t_proxy.set_index(['Season', 'Game_ID', 'Team Name'])[col])
+                                             ).fillna(0)
+    return df, {}
+
+
+
+
+def _stage_matchups(df):
+    """Opponent pairing + strength of schedule.
+    Team rows are sorted by (Season, Game_ID); in a head-to-head game the two team rows
+    are then neighbours, so row i's opponent is row i ^ 1. Results are written per
+    (Season, Game_ID, Team Name) group and gathered onto player + team rows — no self-merge."""
+    df = df.copy(deep=False)
+    key = ['Season', 'Game_ID', 'Team Name']
+    t_logs = df.loc[df['Type'] == 'Team', key + ['PTS', 'FGM', 'FGA', 'TO', 'FTA', 'Win']]
+    t_logs = t_logs.assign(Team_Win_Pct=t_logs.groupby(['Season', 'Team Name'])['Win'].transform('mean'))
+    t_logs = t_logs.sort_values(['Season', 'Game_ID'], kind='stable')
+
+
+    by_game = t_logs.groupby(['Season', 'Game_ID'], sort=False)['Team Name']
+    pairable = t_logs[(by_game.transform('nunique') == 2) & (by_game.transform('size') == 2)]
+
+
+    if not pairable.empty:
+        opp = np.arange(len(pairable)) ^ 1
+        col = {c: pairable[c].to_numpy() for c in ['PTS', 'FGM', 'FGA', 'TO', 'FTA', 'Team_Win_Pct', 'Team Name']}
+        opp_poss = col['FGA'][opp] + (0.44 * col['FTA'][opp]) + col['TO'][opp]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = {'Point_Diff': col['PTS'] - col['PTS'][opp],
+                   'Opp_PPP': np.where(opp_poss > 0, col['PTS'][opp] / opp_poss, 0),
+                   'Opp_FG%': np.where(col['FGA'][opp] > 0, (col['FGM'][opp] / col['FGA'][opp]) * 100, 0),
+                   'SOS_Game': col['Team_Win_Pct'][opp],
+                   'Opp_Name': col['Team Name'][opp],
+                   'Opp_PTS': col['PTS'][opp]}
+
+
+        gid = df.groupby(key, sort=False).ngroup().to_numpy()
+        n_groups = gid.max() + 1
+        pair_gid = gid[df.index.get_indexer(pairable.index)]
+        hit = gid >= 0
+        for name, vals in out.items():
+            block = np.full(n_groups, np.nan, dtype=object if name == 'Opp_Name' else float)
+            block[pair_gid] = vals
+            res = np.full(len(df), np.nan, dtype=block.dtype)
+            res[hit] = block[gid[hit]]
+            df[name] = res
+    else:
+        # No pairable head-to-head games at all — still guarantee columns exist.
+        df['Point_Diff'] = 0.0
+        df['Opp_PPP'] = np.nan
+        df['Opp_FG%'] = np.nan
+        df['SOS_Game'] = np.nan
+        df['Opp_Name'] = None
+        df['Opp_PTS'] = np.nan
+    return df, {}
+
+
+
+
+CATEGORY_COLS = ['Player/Team', 'Team Name', 'Type', 'Era', 'Game_Type', 'GKey', 'Opp_Name']
+COUNT_COLS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FOULS', 'TO', 'FGA', 'FGM', '3PM', '3PA',
+              'FTA', 'FTM', 'OREB', 'DREB', 'MIN', 'Q1', 'Q2', 'Q3', 'Q4',
+              'Position_Num', 'Tipped_Passes', 'Shots_Affected', 'FB_Points']
+
+
+
+
+def compact_frame(df):
+    """Repeated strings -> category; whole-number counting stats -> int16 (Win -> int8).
+    Fractional / NaN-bearing and derived float columns are left as float64 so every
+    aggregate stays bit-identical. Returns (frame, {'before','after'} bytes).
+    NOTE: groupby on a category column needs observed=True (else empty groups appear)."""
+    before = int(df.memory_usage(deep=True).sum())
+    df = df.copy(deep=False)
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype('category')
+    for c in COUNT_COLS + ['Win']:
+        if c not in df.columns:
+            continue
+        v = df[c]
+        if v.isna().any() or not (v % 1 == 0).all():
+            continue
+        small = np.int8 if c == 'Win' else np.int16   # int16 floor: row-wise sums can't wrap
+        lo, hi = (v.min(), v.max()) if len(v) else (0, 0)
+        info = np.iinfo(small)
+        df[c] = v.astype(small if info.min <= lo and hi <= info.max else np.int32)
+    return df, {'before': before, 'after': int(df.memory_usage(deep=True).sum())}
+
 
 
-        return {'df': df, 'health': health}
-    except Exception as e:
-        return f"{type(e).__name__}: {e}"
+
+def add_surrogate_keys(df):
+    """int32 surrogate keys on every row: PID (player rows; -1 on team rows / unnamed),
+    TID and GID. Each id is the row position in its sorted dimension table (league_dims)."""
+    df = df.copy(deep=False)
+    is_p = (df['Type'] == 'Player').to_numpy()
+    pid = np.full(len(df), -1, dtype=np.int32)
+    pid[is_p] = pd.factorize(df.loc[is_p, 'Player/Team'], sort=True)[0]
+    df['PID'] = pid
+    df['TID'] = pd.factorize(df['Team Name'], sort=True)[0].astype(np.int32)
+    df['GID'] = df.groupby(['Season', 'Game_ID'], observed=True).ngroup().astype(np.int32)
+    return df, {}
+
+
+
+
+def league_dims(df):
+    """Dimension tables (players / teams / games / blocks), id == row position."""
+    def dim(id_col, cols, keep):
+        d = df.loc[keep, [id_col] + cols].drop_duplicates(id_col).sort_values(id_col)
+        return d.astype({c: object for c in cols if isinstance(d[c].dtype, pd.CategoricalDtype)}).reset_index(drop=True)
+    games = dim('GID', ['GKey', 'Season', 'Game_ID', 'Game_Type', 'Era'], slice(None))
+    # BID = stat block (Season x Game_Type x playoff window 9001-9999): every Data Scope and
+    # playoff scope is a union of whole blocks, so scope stats can be summed from blocks
+    po_window = (games['Game_ID'] >= 9001) & (games['Game_ID'] <= 9999)
+    games['BID'] = games.groupby([games['Season'], games['Game_Type'], po_window]).ngroup().astype(np.int32)
+    blocks = games.drop_duplicates('BID').sort_values('BID')
+    blocks = pd.DataFrame({'BID': blocks['BID'], 'Season': blocks['Season'], 'Game_Type': blocks['Game_Type'],
+                           'Playoffs': po_window[blocks.index]}).reset_index(drop=True)
+    return {'blocks': blocks, 'players': dim('PID', ['Player/Team'], df['PID'] >= 0),
+            'teams': dim('TID', ['Team Name'], slice(None)),
+            'games': games}
+
+
+
+
+class RowIndex:
+    """CSR index over an int key per row: rows(k) = row positions with key k, sliced out
+    in O(its rows) — ascending, or in `by`'s order (a permutation of the rows) when given.
+    Keys < 0 (no entity) are not indexed."""
+
+    def __init__(self, keys, by=None):
+        keys = np.asarray(keys, dtype=np.int64)
+        pos = np.arange(len(keys)) if by is None else np.asarray(by, dtype=np.int64)
+        has = pos[keys[pos] >= 0]
+        self.order = has[np.argsort(keys[has], kind='stable')]
+        self.offsets = np.r_[0, np.cumsum(np.bincount(keys[has]))]
+
+    def rows(self, key):
+        if key is None or not 0 <= key < len(self.offsets) - 1:
+            return self.order[:0]
+        return self.order[self.offsets[key]:self.offsets[key + 1]]
+
+
+
+
+def row_indexes(df):
+    """Ingest-time row indexes: player (PID) -> its rows, team (TID) -> its team-total rows,
+    roster (TID) -> its player rows, game (GID) -> every row of the game."""
+    is_team = (df['Type'] == 'Team').to_numpy()
+    tid = df['TID'].to_numpy()
+    return {'player': RowIndex(df['PID'].to_numpy()), 'team': RowIndex(np.where(is_team, tid, -1)),
+            'roster': RowIndex(np.where(is_team, -1, tid)), 'game': RowIndex(df['GID'].to_numpy())}
+
+
+
+
+# per-block sufficient statistics: compute_stats' means/rates are sums / counts of these
+P_BLOCK_SUMS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'TO', 'FGM', 'FGA', '3PM', '3PA', 'FTM', 'FTA',
+                'PIE_Raw', 'Position_Num', 'Tipped_Passes', 'Shots_Affected', 'FB_Points',
+                'USG_Game', 'ORtg_Game', 'Game_Score', 'Win']
+P_BLOCK_MAXES = ['PTS', 'REB', 'AST', 'STL', 'BLK', '3PM']
+T_BLOCK_SUMS = ['PTS', 'Poss_Raw', 'REB', 'AST', 'STL', 'BLK', 'TO', 'FGM', 'FGA', '3PM', 'Win']
+T_BLOCK_NULLABLE = ['Opp_PTS', 'Point_Diff', 'Opp_PPP', 'SOS_Game']   # NaN on unpaired games
+
+
+
+
+def _gather(df, mask, cols):
+    """df.loc[mask, cols]; a sparse mask is gathered column by column (no wide-frame take)."""
+    idx = np.flatnonzero(mask)
+    if len(idx) > len(df) // 8:
+        return df.loc[mask, cols]
+    return pd.DataFrame({c: df[c].to_numpy()[idx] for c in cols}, index=df.index[idx])
+
+
+def season_blocks(df, dims):
+    """Additive per-(player, block) and per-(team, block) sufficient statistics: row counts,
+    games, sums, maxima, PTS sum of squares, non-null counts for NaN-able columns, and the
+    last row seen (for 'current team'). Any block-aligned scope = sum/max over its blocks."""
+    n_b = len(dims['blocks'])
+    bid = dims['games']['BID'].to_numpy()[df['GID'].to_numpy()].astype(np.int64)
+    pos = np.arange(len(df))
+
+
+    def keyed(agg, id_col):
+        """(id, block) code index -> leading int32 id / BID columns."""
+        ids, bids = np.divmod(agg.index.to_numpy(), n_b)
+        agg.insert(0, 'BID', bids.astype(np.int32))
+        agg.insert(0, id_col, ids.astype(np.int32))
+        return agg.reset_index(drop=True)
+
+
+    p = (df['PID'] >= 0).to_numpy()
+    pf = _gather(df, p, ['PID', 'TID', 'GID'] + P_BLOCK_SUMS).assign(_pos=pos[p])
+    players = group_reduce(pf['PID'].to_numpy().astype(np.int64) * n_b + bid[p], pf, sums=P_BLOCK_SUMS, maxes=P_BLOCK_MAXES,
+                           distinct=pf['GID'], last=['_pos', 'TID'])
+    players = players.rename(columns={'n_rows': 'n', 'n_distinct': 'GP', '_pos_last': 'last_pos', 'TID_last': 'last_TID'})
+    players['last_TID'] = players['last_TID'].astype(np.int64)
+
+
+    t = (df['Type'] == 'Team').to_numpy()
+    tf = _gather(df, t, ['TID', 'GID'] + T_BLOCK_SUMS + T_BLOCK_NULLABLE)
+    teams = group_reduce(tf['TID'].to_numpy().astype(np.int64) * n_b + bid[t], tf, sums=T_BLOCK_SUMS + T_BLOCK_NULLABLE,
+                         sumsq=['PTS'], counts=T_BLOCK_NULLABLE, distinct=tf['GID'])
+    teams = teams.rename(columns={'n_rows': 'n', 'n_distinct': 'GP'})
+    return {'players': keyed(players, 'PID'), 'teams': keyed(teams, 'TID')}
+
+
+
+
+# ---- DATA-QUALITY RULES -----------------------------------------------------
+# (rule, row type, DataFrame.eval expression that is True on a violating row, columns to show)
+DQ_RULES = [
+    ('FGM > FGA', 'Player', 'FGM > FGA', ['FGM', 'FGA']),
+    ('3PM > FGM', 'Player', '`3PM` > FGM', ['3PM', 'FGM']),
+    ('3PM > 3PA', 'Player', '`3PM` > `3PA`', ['3PM', '3PA']),
+    ('3PA > FGA', 'Player', '`3PA` > FGA', ['3PA', 'FGA']),
+    ('FTM > FTA', 'Player', 'FTM > FTA', ['FTM', 'FTA']),
+    ('REB ≠ OREB + DREB', 'Player', '(OREB + DREB > 0) & (REB != OREB + DREB)', ['REB', 'OREB', 'DREB']),
+    ('PTS ≠ 2·FGM + 3PM + FTM', 'Player', 'PTS != 2 * FGM + `3PM` + FTM', ['PTS', 'FGM', '3PM', 'FTM']),
+    ('Quarters ≠ PTS', 'Team', '(Q1 + Q2 + Q3 + Q4 > 0) & (Q1 + Q2 + Q3 + Q4 != PTS)',
+     ['PTS', 'Q1', 'Q2', 'Q3', 'Q4']),
+    ('Player on both teams', 'Player', None, ['Team Name']),
+]
+
+
+
+
+def run_dq_rules(df):
+    """Every DQ_RULES check in one vectorized pass over the finished frame.
+    Returns ({rule: row positions in df}, {'⚠️ rule': count}) — positions drive the sidebar drill-down."""
+    is_type = {t: (df['Type'] == t).to_numpy() for t in ('Player', 'Team')}
+    both = np.zeros(len(df), dtype=bool)
+    p = is_type['Player'] & (df['PID'] >= 0).to_numpy()
+    if p.any():
+        n_teams = df[p].groupby(['GID', 'PID'])['TID'].transform('nunique').to_numpy()
+        both[np.flatnonzero(p)[n_teams > 1]] = True
+    hits, health = {}, {}
+    for name, row_type, expr, _ in DQ_RULES:
+        bad = both if expr is None else df.eval(expr).to_numpy(dtype=bool)
+        idx = np.flatnonzero(bad & is_type[row_type])
+        hits[name] = idx
+        health[f"⚠️ {name}"] = len(idx)
+    return hits, health
+
+
+
+
+SOURCE_STAGES = [('types', _stage_types), ('numerics', _stage_numerics), ('dedupe', _stage_dedupe),
+                 ('game_score', _stage_game_score), ('team_totals', _stage_team_totals),
+                 ('wins', _stage_wins), ('ratings', _stage_ratings), ('proxy', _stage_proxy),
+                 ('matchups', _stage_matchups)]
+
+
+_HEALTH_FMT = {
+    'Team totals (recorded / rebuilt)': lambda v: f"{v[0]} / {v[1]}",
+    'Quarter data coverage': lambda v: f"{v[0]}/{v[1]} team-games",
+    'OREB/DREB coverage': lambda v: f"{v[0]}/{v[1]} player rows",
+    'FTA coverage': lambda v: f"{v[0]}/{v[1]} player rows",
+    'History files / chunks': lambda v: f"{v[0]} / {v[1]}",
+}
+_HEALTH_ORDER = ['History files / chunks', '⚠️ History rows already loaded', 'Rows loaded', 'Players recovered (bad Type)', 'Name variants unified',
+                 'Rows dropped (no Game_ID/Season)', 'Duplicate rows removed',
+                 'Team totals (recorded / rebuilt)', 'Quarter data coverage', '⚠️ Quarters ≠ PTS',
+                 'OREB/DREB coverage', 'FTA coverage', 'Wins derived from score']
+
+
+
+
+def _fingerprint(*parts):
+    h = hashlib.sha256(PIPELINE_VERSION.encode())
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode())
+        h.update(b"\0")
+    return h.hexdigest()[:24]
+
+
+
+
+def _frame_fingerprint(df):
+    """Content hash of a frame (values + column names), for stages fed by more than one source."""
+    return _fingerprint(",".join(map(str, df.columns)),
+                        pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+
+
+
+def run_stage(name, source, fn, inp, in_key, cache, timings):
+    """Run (or reuse) one stage; records wall time + row counts. Errors name the stage."""
+    key = _fingerprint(name, in_key)
+    t0 = time.perf_counter()
+    hit = cache.get(key) if cache is not None else None
+    cached = hit is not None
+    if not cached:
+        try:
+            hit = fn(inp)
+        except Exception as e:
+            raise RuntimeError(f"ingest stage '{name}' [{source}] failed — {type(e).__name__}: {e}") from e
+        if cache is not None:
+            cache[key] = hit
+            while len(cache) > 48:
+                cache.pop(next(iter(cache)))
+    out, health = hit
+
+
+    def n_rows(x):
+        return sum(len(f) for f in x) if isinstance(x, list) else (len(x) if isinstance(x, pd.DataFrame) else None)
+
+
+    timings.append({'Stage': name, 'Source': source, 'ms': round((time.perf_counter() - t0) * 1000, 1),
+                    'Rows in': n_rows(inp), 'Rows out': n_rows(out), 'Cached': cached})
+    return out, health, key
+
+
+
+
+def build_league(sheet_raw, history=(), cache=None):
+    """Raw sheet bytes + [(path, digest)] history files -> processed league frame, health
+    report and per-stage timings. `cache` is a dict reused across builds (SheetFeed keeps
+    one) so unchanged stages are skipped.
+
+    Reuse is per source chain, not per game: a changed sheet re-runs every sheet stage,
+    and compact, keys, quality, dims, blocks and indexes always run over the whole league.
+    A canonical-name change also re-runs the history chains."""
+    timings, parts = [], []
+    frames, keys = [], []
+    f, h, k = run_stage('read', 'sheet', _stage_read, sheet_raw, _fingerprint(sheet_raw), cache, timings)
+    sources = [('sheet', f, k)]
+
+
+    # SPAM history (Seasons 1-6 and any archives), one chain per file, streamed from disk
+    claimed, seen = NO_GAMES, []
+    for path, digest in history:
+        seen.append(digest)
+        try:
+            f, h, k = run_stage('read', os.path.basename(path),
+                                lambda _, p=path, c=claimed: _stage_read_history(p, c),
+                                None, "|".join(seen), cache, timings)
+        except RuntimeError:
+            continue   # unreadable history is skipped, never fatal
+        parts.append(h)
+        if f.empty:
+            continue
+        games = _game_codes(f)
+        claimed = pd.Index(np.union1d(claimed, games[games >= 0]))
+        sources.append((os.path.basename(path), f, k))
+
+
+    for source, f, k in sources:
+        f, h, k = run_stage('types', source, _stage_types, f, k, cache, timings)
+        parts.append(h)
+        frames.append(f)
+        keys.append((source, k))
+
+
+    frames, h, _ = run_stage('names', 'all', _stage_names, frames, "|".join(k for _, k in keys),
+                             cache, timings)
+    parts.append(h)
+
+
+    out = []
+    for (source, _), f in zip(keys, frames):
+        k = _frame_fingerprint(f)
+        for name, fn in SOURCE_STAGES[1:]:
+            f, h, k = run_stage(name, source, fn, f, k, cache, timings)
+            parts.append(h)
+        out.append(f)
+    df = pd.concat(out, ignore_index=True) if len(out) > 1 else out[0]
+    df, memory, _ = run_stage('compact', 'all', compact_frame, df, _frame_fingerprint(df), None, timings)
+    df, _, _ = run_stage('keys', 'all', add_surrogate_keys, df, None, None, timings)
+    dq, h, _ = run_stage('quality', 'all', run_dq_rules, df, None, None, timings)
+    parts.append(h)
+
+
+    totals = {}
+    for h in parts:
+        for k, v in h.items():
+            if isinstance(v, tuple):
+                acc = totals.get(k, (0,) * len(v))
+                totals[k] = tuple(a + b for a, b in zip(acc, v))
+            else:
+                totals[k] = totals.get(k, 0) + v
+    health = {}
+    for k in _HEALTH_ORDER + [k for k in totals if k not in _HEALTH_ORDER]:
+        if k not in totals or (k.startswith('⚠️') and not totals[k]):
+            continue
+        health[k] = _HEALTH_FMT[k](totals[k]) if k in _HEALTH_FMT else totals[k]
+    dims = league_dims(df)
+    blocks, _, _ = run_stage('blocks', 'all', lambda d: (season_blocks(d, dims), {}), df, None, None, timings)
+    index, _, _ = run_stage('index', 'all', lambda d: (row_indexes(d), {}), df, None, None, timings)
+    return {'df': df, 'dims': dims, 'blocks': blocks, 'index': index, 'dq': dq, 'health': health,
+            'timings': timings, 'memory': memory}
 
 
 
@@ -605,7 +1240,19 @@ if isinstance(_loaded, str):
 
 
 full_df = _loaded['df']
+DATA_KEY = _loaded.get('key')   # ingest hash — versions every process-wide derived cache
+DIMS = _loaded['dims']
+SEASON_BLOCKS = _loaded['blocks']
+PLAYER_NAMES = DIMS['players']['Player/Team'].to_numpy()   # PID -> name
+TEAM_NAMES = DIMS['teams']['Team Name'].to_numpy()         # TID -> name
+PLAYER_IDS = {n: i for i, n in enumerate(PLAYER_NAMES)}
+TEAM_IDS = {n: i for i, n in enumerate(TEAM_NAMES)}
+GAME_IDS = {g: i for i, g in enumerate(zip(DIMS['games']['Season'], DIMS['games']['Game_ID']))}   # (Season, Game_ID) -> GID
+ROW_INDEX = _loaded['index']
 DATA_HEALTH = _loaded['health']
+INGEST_TIMINGS = _loaded.get('timings', [])
+FRAME_MEMORY = _loaded.get('memory', {})
+DQ_HITS = _loaded.get('dq', {})
 
 
 if full_df is None or full_df.empty:
@@ -615,38 +1262,115 @@ if full_df is None or full_df.empty:
 
 
 
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _player_rows(data_key):
+    """Player-game rows of the snapshot, filtered once per data version and shared read-only."""
+    return full_df[full_df['Type'] == 'Player']
+
+
+
+
+def entity_rows(kind, key, game_mask=None, cols=None):
+    """full_df rows of one entity through ROW_INDEX — 'player' (PID), 'team' / 'roster' (TID:
+    team-total / player rows), 'game' (GID) — optionally kept to a games mask and to `cols`.
+    O(its rows), frame order kept; an unknown key (None) gives no rows."""
+    pos = ROW_INDEX[kind].rows(key)
+    if game_mask is not None:
+        pos = pos[game_mask.to_numpy()[full_df['GID'].to_numpy()[pos]]]
+    return (full_df if cols is None else full_df[cols]).iloc[pos]
+
+
+
+
 # =============================================================================
 # 4. GLOBAL MILESTONE / CLUB TRACKER
 # =============================================================================
-@st.cache_data(ttl=60)
-def build_clubs(df):
-    gp = df[df['Type'].astype(str).str.lower() == 'player'].copy()
-    season_totals = gp.groupby(['Player/Team', 'Season']).sum(numeric_only=True).reset_index()
+# (club, scope, {stat: minimum total}, clubs it supersedes). 'season' rules test each
+# (player, season) total, 'career' rules the all-time total. A club hides the clubs it
+# supersedes only on the same totals row: 40/40/40 replaces 30/30/30 for that season.
+CLUB_RULES = [
+    ('40/40/40 Club', 'season', {'REB': 40, 'STL': 40, 'AST': 40}, ['30/30/30 Club']),
+    ('30/30/30 Club', 'season', {'REB': 30, 'STL': 30, 'AST': 30}, []),
+    ('300 Pts / 100 3s', 'season', {'PTS': 300, '3PM': 100}, []),
+    ('100 Pts / 100 Reb', 'season', {'PTS': 100, 'REB': 100}, []),
+]
+CLUB_BIT = {c: i for i, (c, _, _, _) in enumerate(CLUB_RULES)}   # club -> bit in the uint32 set
+_CLUB_BADGES = sorted((c, i) for c, i in CLUB_BIT.items())        # badges show alphabetically
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def build_clubs(data_key, _blocks, _dims):
+    """uint32 club bitset per PID, each CLUB_RULES scope evaluated as vectorized masks over
+    totals summed out of the season blocks (never raw rows). Cached on data_key, which
+    versions the blocks / dims passed with it."""
+    pb = _blocks['players']
+    pid = pb['PID'].to_numpy().astype(np.int64)
+    season = pd.factorize(_dims['blocks']['Season'].to_numpy()[pb['BID'].to_numpy()])[0]
+    keys = {'season': pid * (season.max() + 1 if len(season) else 1) + season, 'career': pid}
+    bits = np.zeros(len(_dims['players']), dtype=np.uint32)
+    for scope in dict.fromkeys(sc for _, sc, _, _ in CLUB_RULES):
+        rules = [r for r in CLUB_RULES if r[1] == scope]
+        stats = sorted({c for _, _, need, _ in rules for c in need})
+        totals = group_reduce(keys[scope], pb, sums=stats, last=['PID'])
+        hit = {club: np.logical_and.reduce([totals[c].to_numpy() >= v for c, v in need.items()])
+               for club, _, need, _ in rules}
+        for club, _, _, supersedes in rules:
+            for lower in supersedes:
+                hit[lower] = hit[lower] & ~hit[club]
+        row_bits = np.zeros(len(totals), dtype=np.uint32)
+        for club, h in hit.items():
+            row_bits |= h.astype(np.uint32) << CLUB_BIT[club]
+        np.bitwise_or.at(bits, totals['PID_last'].to_numpy(), row_bits)
+    return bits
+
+
+
 
+def club_names(bits):
+    """Club names in one bitset, alphabetical."""
+    bits = 0 if bits is None or pd.isna(bits) else int(bits)
+    return [c for c, i in _CLUB_BADGES if bits >> i & 1]
 
-    def calc_clubs(row):
-        clubs = []
-        if row['REB'] >= 40 and row['STL'] >= 40 and row['AST'] >= 40:
-            clubs.append("40/40/40 Club")
-        elif row['REB'] >= 30 and row['STL'] >= 30 and row['AST'] >= 30:
-            clubs.append("30/30/30 Club")
-        if row['PTS'] >= 300 and row['3PM'] >= 100:
-            clubs.append("300 Pts / 100 3s")
-        if row['PTS'] >= 100 and row['REB'] >= 100:
-            clubs.append("100 Pts / 100 Reb")
-        return clubs
 
 
-    season_totals['Clubs'] = season_totals.apply(calc_clubs, axis=1)
-    pc = season_totals.groupby('Player/Team')['Clubs'].agg(
-        lambda x: [i for sub in x for i in sub if i]).reset_index()
-    pc['Clubs'] = pc['Clubs'].apply(lambda x: sorted(set(x)))
-    return pc
 
+def club_count(bits):
+    """Clubs per bitset (popcount), vectorized."""
+    bits = np.asarray(bits, dtype=np.uint32)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits)
+    return np.unpackbits(bits.reshape(-1, 1).view(np.uint8), axis=1).sum(axis=1).reshape(bits.shape)
 
 
 
-player_clubs = build_clubs(full_df)
+
+CLUB_BITS = build_clubs(DATA_KEY, SEASON_BLOCKS, DIMS)   # PID -> club bitset
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def season_deltas(data_key, _blocks, _dims):
+    """Every player's season lines (GP, per-game PIE / PTS over all game types), one row per
+    (player, season played), with the previous season that player played as *_Prev columns
+    and the change as Jump (PIE) / PTS_Jump. A first season has NaN there. Summed out of
+    the season blocks once per data version; MIP races and drop-offs are slices of it."""
+    pb = _blocks['players']
+    code, uniq = pd.factorize(_dims['blocks']['Season'].to_numpy()[pb['BID'].to_numpy()], sort=True)
+    n_s = max(len(uniq), 1)
+    agg = group_reduce(pb['PID'].to_numpy().astype(np.int64) * n_s + code, pb, sums=['GP', 'n', 'PIE_Raw', 'PTS'])
+    pid, code = np.divmod(agg.index.to_numpy(), n_s)   # sorted: by player, then season
+    lines = pd.DataFrame({'PID': pid, 'Player/Team': _dims['players']['Player/Team'].to_numpy()[pid], 'Season': uniq[code],
+                          'GP': agg['GP'].to_numpy(), 'PIE': (agg['PIE_Raw'] / agg['n']).to_numpy(),
+                          'PTS': (agg['PTS'] / agg['n']).to_numpy()})
+    same = np.r_[False, pid[1:] == pid[:-1]]
+    for c in ['Season', 'GP', 'PIE', 'PTS']:
+        lines[c + '_Prev'] = lines[c].shift(1).where(same)
+    lines['Jump'] = lines['PIE'] - lines['PIE_Prev']
+    lines['PTS_Jump'] = lines['PTS'] - lines['PTS_Prev']
+    return lines
 
 
 
@@ -730,8 +1454,9 @@ def generate_2k_player_card(player_name, stats, rank=""):
                   f'font-weight:bold; padding:8px; border-radius:50%; border:2px solid #fff; z-index:10;">#{rank}</div>'
                   if rank else "")
     clubs_html = ""
-    if isinstance(stats.get('Clubs'), list) and stats['Clubs']:
-        badges = "".join([f"<span class='chip'>{c}</span>" for c in stats['Clubs']])
+    clubs = club_names(stats.get('Clubs'))
+    if clubs:
+        badges = "".join([f"<span class='chip'>{c}</span>" for c in clubs])
         clubs_html = f"<div style='margin-top:10px; padding-top:8px; border-top:1px dashed #444; width:100%;'>{badges}</div>"
 
 
@@ -1001,19 +1726,17 @@ def find_player_headshot_uri(player):
 
 def player_season_lines(player):
     """Career + per-season average stat lines for a player, pulled from full_df."""
-    d = full_df[(full_df['Type'].astype(str).str.lower() == 'player')
-                & (full_df['Player/Team'] == player)]
-    if d.empty:
+    pid = PLAYER_IDS.get(player)
+    if pid is None:
         return []
+    d = entity_rows('player', pid)
 
 
     def line(frame, label):
         def m(c):
             return float(pd.to_numeric(frame[c], errors='coerce').mean()) if c in frame.columns else 0.0
-        gp = int(frame['GKey'].nunique()) if 'GKey' in frame.columns else len(frame)
-        team = ""
-        if 'Team Name' in frame.columns and frame['Team Name'].notna().any():
-            team = str(frame['Team Name'].dropna().iloc[-1])
+        gp = int(frame['GID'].nunique())
+        team = str(TEAM_NAMES[frame['TID'].iloc[-1]])
         return {"label": label, "gp": gp, "team": team,
                 "pts": m('PTS'), "reb": m('REB'), "ast": m('AST'),
                 "stl": m('STL'), "blk": m('BLK'), "pie": m('PIE_Raw'), "tpm": m('3PM')}
@@ -1135,7 +1858,7 @@ def render_rotating_card(player, key="rc", team=None, height=440, speed_ms=4000)
 
 
 
-@st.cache_data(ttl=120)
+@st.cache_resource(ttl=120, show_spinner=False)
 def _cached_logo_uri(team):
     return find_team_logo_uri(team)
 
@@ -1153,7 +1876,7 @@ def team_logo_html(team, px=22, radius=4, ml=0, mr=6):
 
 
 
-@st.cache_data(ttl=120)
+@st.cache_resource(ttl=120, show_spinner=False)
 def player_card_uri(player):
     """First custom card image for a player, or '' — used on flip cards."""
     uris = find_player_card_uris(player)
@@ -1241,28 +1964,68 @@ RARITY_TIERS = [(0.95, "Legendary", "#f1c40f"), (0.85, "Epic", "#9b59b6"),
 
 
 
-@st.cache_data(ttl=60)
-def _career_ratings():
+ARCHETYPE_SIG = {
+    "Microwave Chucker": "TPM", "Glass Cleaner": "REB", "Pocket Picker": "STL",
+    "Rim Protector": "BLK", "Corner Specialist": "TP%", "Dime Dropper": "AST",
+    "Combo Guard": "PTS", "Lockdown Wing": "DEF", "Iron Man Grind": "GP",
+}
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _card_profiles(data_key):
+    """Per-player card profile, one aligned row per name: career PIE percentile ('pct'), rarity
+    'Tier' / 'Color' and 'Archetype'. Tier = searchsorted over the RARITY_TIERS thresholds;
+    archetype = argmax across a percentile-rank matrix of the ARCHETYPE_SIG stats (first
+    archetype wins a tie)."""
+    d = _player_rows(data_key)
+    g = d.groupby('Player/Team', observed=True).agg(
+        PIE=('PIE_Raw', 'mean'), PTS=('PTS', 'mean'), REB=('REB', 'mean'), AST=('AST', 'mean'),
+        STL=('STL', 'mean'), BLK=('BLK', 'mean'), TPM=('3PM', 'mean'),
+        TPA=('3PA', 'mean'), GP=('GKey', 'nunique'))
+    g['DEF'] = g['STL'] + g['BLK']
+    g['TP%'] = np.where(g['TPA'] >= 1.0, g['TPM'] / g['TPA'].replace(0, 1) * 100, 0)  # gate low volume
+    pct = g['PIE'].rank(pct=True).to_numpy()
+
+
+    floors = np.array([t for t, _, _ in RARITY_TIERS])[::-1]   # ascending thresholds
+    tier = len(RARITY_TIERS) - np.searchsorted(floors, pct, side='right')   # index into RARITY_TIERS
+    tier = np.where(np.isnan(pct), len(RARITY_TIERS) - 1, tier)   # no PIE -> Common
+    ranks = g[list(ARCHETYPE_SIG.values())].rank(pct=True).to_numpy()
+    best = np.nan_to_num(ranks, nan=-np.inf).argmax(axis=1)
+    return pd.DataFrame({'pct': pct,
+                         'Tier': np.array([n for _, n, _ in RARITY_TIERS], dtype=object)[tier],
+                         'Color': np.array([c for _, _, c in RARITY_TIERS], dtype=object)[tier],
+                         'Archetype': np.array(list(ARCHETYPE_SIG), dtype=object)[best]},
+                        index=pd.Index(g.index.astype(object), name='Player/Team'))
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _career_ratings(data_key):
     """Percentile rank of each player's career impact (PIE) across the league."""
-    d = full_df[full_df['Type'].astype(str).str.lower() == 'player']
-    if d.empty:
-        return {}
-    g = d.groupby('Player/Team').agg(PIE=('PIE_Raw', 'mean')).reset_index()
-    g['pct'] = g['PIE'].rank(pct=True)
-    return dict(zip(g['Player/Team'], g['pct']))
+    prof = _card_profiles(data_key)
+    return dict(zip(prof.index, prof['pct']))
 
 
 
 
 def card_rarity(player):
     """(tier_name, hex_color) from career percentile — stat-based rarity."""
-    pct = _career_ratings().get(player)
-    if pct is None:
+    prof = _card_profiles(DATA_KEY)
+    if player not in prof.index:
         return ("Common", "#8a929c")
-    for thresh, name, color in RARITY_TIERS:
-        if pct >= thresh:
-            return (name, color)
-    return ("Common", "#8a929c")
+    return (prof.at[player, 'Tier'], prof.at[player, 'Color'])
+
+
+
+
+def card_rarities(players):
+    """card_rarity for a sequence of names, as aligned (tier, color) arrays."""
+    prof = _card_profiles(DATA_KEY).reindex(pd.Index(players, dtype=object))
+    return prof['Tier'].fillna("Common").to_numpy(), prof['Color'].fillna("#8a929c").to_numpy()
 
 
 
@@ -1324,7 +2087,7 @@ def _popularity_raw_map():
     pop = _load_popularity()
     mentions = pop.get("mentions", {}) if isinstance(pop, dict) else {}
     roles = pop.get("roles", {}) if isinstance(pop, dict) else {}
-    players = set(_career_ratings().keys()) | set(mentions.keys()) | set(roles.keys())
+    players = set(_career_ratings(DATA_KEY).keys()) | set(mentions.keys()) | set(roles.keys())
     raw = {}
     for p in players:
         raw[p] = (_awards_score(p) * 2.0
@@ -1345,7 +2108,7 @@ def player_popularity(player):
 
 
 def player_price(player, w_stat=0.5, w_pop=0.5, cap=3.0):
-    stat = _career_ratings().get(player, 0.0)
+    stat = _career_ratings(DATA_KEY).get(player, 0.0)
     pop = player_popularity(player)
     tot = max(w_stat + w_pop, 0.01)
     return round(cap * ((w_stat * stat) + (w_pop * pop)) / tot, 2)
@@ -1353,18 +2116,74 @@ def player_price(player, w_stat=0.5, w_pop=0.5, cap=3.0):
 
 
 
+FORM_STATS = ['PIE_Raw', 'PTS', 'Game_Score']
+
+
+
+
+class FormEngine:
+    """Last-N-game windows for every player at once, for one data version. Player rows are
+    sorted once by (PID, Season, Game_ID) and each FORM_STATS column kept as a running sum
+    (NaN as 0) beside a running non-null count, so any window's mean is two differences.
+    Results are memoized per (scope cell, N) — like StatCube, shared by all sessions."""
+
+    def __init__(self, df):
+        p = df[df['PID'] >= 0]
+        order = np.lexsort((p['Game_ID'].to_numpy(), p['Season'].to_numpy(), p['PID'].to_numpy()))
+        self.pid = p['PID'].to_numpy()[order]
+        self.gid = p['GID'].to_numpy()[order]
+        v = np.column_stack([p[c].to_numpy(dtype=np.float64) for c in FORM_STATS])[order]
+        self.ok = ~np.isnan(v)
+        self.vals = np.where(self.ok, v, 0.0)
+        self._memo = {}
+
+    def windows(self, n, cell=None, game_mask=None):
+        """Per-PID frame over the player's games in `game_mask` (all games if None): 'games',
+        then per FORM_STATS column c the mean of every game (c + '_avg'), of the last n games
+        (c + '_recent') and the non-null count (c + '_n'). NaN means skip; none -> NaN."""
+        if (cell, n) in self._memo:
+            return self._memo[(cell, n)]
+        keep = np.ones(len(self.pid), dtype=bool) if game_mask is None else game_mask.to_numpy()[self.gid]
+        pid, vals, ok = self.pid[keep], self.vals[keep], self.ok[keep]
+        starts = np.flatnonzero(np.r_[True, pid[1:] != pid[:-1]]) if len(pid) else np.empty(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(pid)].astype(np.int64)
+        lo = np.maximum(starts, ends - n)
+        cs = np.vstack([np.zeros((1, len(FORM_STATS))), np.cumsum(vals, axis=0)])
+        cn = np.vstack([np.zeros((1, len(FORM_STATS)), dtype=np.int64), np.cumsum(ok, axis=0)])
+        out = {'games': ends - starts}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j, c in enumerate(FORM_STATS):
+                n_all, n_recent = cn[ends, j] - cn[starts, j], cn[ends, j] - cn[lo, j]
+                out[c + '_avg'] = np.where(n_all > 0, (cs[ends, j] - cs[starts, j]) / n_all, np.nan)
+                out[c + '_recent'] = np.where(n_recent > 0, (cs[ends, j] - cs[lo, j]) / n_recent, np.nan)
+                out[c + '_n'] = n_all
+        res = pd.DataFrame(out, index=pd.Index(pid[starts], name='PID'))
+        self._memo[(cell, n)] = res
+        return res
+
+    def trend(self, n=3, stat='PIE_Raw', band=0.05):
+        """Career trend per PID: +1 / -1 when the last n games run `band` above / below the
+        career mean (needs n + 1 logged games), else 0."""
+        if ('trend', n, stat, band) not in self._memo:
+            w = self.windows(n)
+            base, recent = w[stat + '_avg'], w[stat + '_recent']
+            sign = np.where(recent > base * (1 + band), 1, np.where(recent < base * (1 - band), -1, 0))
+            self._memo[('trend', n, stat, band)] = pd.Series(np.where(w[stat + '_n'] > n, sign, 0), index=w.index)
+        return self._memo[('trend', n, stat, band)]
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _form_engine(data_key):
+    return FormEngine(full_df)
+
+
+
+
 def player_form(player):
-    d = full_df[(full_df['Type'].astype(str).str.lower() == 'player')
-                & (full_df['Player/Team'] == player)].sort_values(['Season', 'Game_ID'])
-    pie = pd.to_numeric(d['PIE_Raw'], errors='coerce')
-    if len(pie.dropna()) < 4:
-        return 0
-    recent, base = pie.tail(3).mean(), pie.mean()
-    if recent > base * 1.05:
-        return 1
-    if recent < base * 0.95:
-        return -1
-    return 0
+    """Market trend arrow: +1 heating up, -1 cooling down, 0 flat (last 3 games' PIE vs career)."""
+    return int(_form_engine(DATA_KEY).trend(3).get(PLAYER_IDS.get(player), 0))
 
 
 
@@ -1414,38 +2233,17 @@ def fantasy_points(s, role):
 
 
 
-ARCHETYPE_SIG = {
-    "Microwave Chucker": "TPM", "Glass Cleaner": "REB", "Pocket Picker": "STL",
-    "Rim Protector": "BLK", "Corner Specialist": "TP%", "Dime Dropper": "AST",
-    "Combo Guard": "PTS", "Lockdown Wing": "DEF", "Iron Man Grind": "GP",
-}
-
-
-
-
-@st.cache_data(ttl=60)
-def _archetype_map():
-    d = full_df[full_df['Type'].astype(str).str.lower() == 'player']
-    if d.empty:
-        return {}
-    g = d.groupby('Player/Team').agg(
-        PTS=('PTS', 'mean'), REB=('REB', 'mean'), AST=('AST', 'mean'),
-        STL=('STL', 'mean'), BLK=('BLK', 'mean'), TPM=('3PM', 'mean'),
-        TPA=('3PA', 'mean'), GP=('GKey', 'nunique')).reset_index()
-    g['DEF'] = g['STL'] + g['BLK']
-    g['TP%'] = np.where(g['TPA'] >= 1.0, g['TPM'] / g['TPA'].replace(0, 1) * 100, 0)  # gate low volume
-    ranks = {arch: g[col].rank(pct=True) for arch, col in ARCHETYPE_SIG.items()}
-    out = {}
-    for i in range(len(g)):
-        best = max(ARCHETYPE_SIG.keys(), key=lambda a2: ranks[a2].iloc[i])
-        out[g.iloc[i]['Player/Team']] = best
-    return out
+def player_archetype(player):
+    prof = _card_profiles(DATA_KEY)
+    return prof.at[player, 'Archetype'] if player in prof.index else "Combo Guard"
 
 
 
 
-def player_archetype(player):
-    return _archetype_map().get(player, "Combo Guard")
+def player_archetypes(players):
+    """player_archetype for a sequence of names, as one aligned array."""
+    arch = _card_profiles(DATA_KEY)['Archetype'].reindex(pd.Index(players, dtype=object))
+    return arch.fillna("Combo Guard").to_numpy()
 
 
 
@@ -1538,6 +2336,7 @@ min_gp_filter = st.sidebar.slider("Min Games Played (tables)", 0, 20, 1)
 
 if st.sidebar.button("🔄 Refresh Sheet", use_container_width=True):
     st.cache_data.clear()
+    _league_feed().refresh_now()
     _rerun()
 
 
@@ -1545,6 +2344,24 @@ if DATA_HEALTH:
     with st.sidebar.expander("🩺 Data Health"):
         for hk, hv in DATA_HEALTH.items():
             st.markdown(f"**{hk}:** {hv}")
+        st.caption(_league_feed().status())
+    dq_bad = {k: v for k, v in DQ_HITS.items() if len(v)}
+    if dq_bad:
+        with st.sidebar.expander(f"🧪 Data Quality ({sum(len(v) for v in dq_bad.values())} rows)"):
+            rule = st.selectbox("Rule", list(dq_bad), format_func=lambda r: f"{r} ({len(dq_bad[r])})",
+                                key="dq_rule")
+            show_cols = next(c for n, _, _, c in DQ_RULES if n == rule)
+            st.dataframe(full_df.iloc[dq_bad[rule]][['Season', 'Game_ID', 'Team Name', 'Player/Team'] + show_cols],
+                         use_container_width=True, hide_index=True)
+    if INGEST_TIMINGS:
+        with st.sidebar.expander("⏱️ Ingest Stages"):
+            tdf = pd.DataFrame(INGEST_TIMINGS)
+            st.caption(f"Last build: {tdf['ms'].sum() / 1000:.2f}s across {len(tdf)} stages "
+                       f"({int(tdf['Cached'].sum())} reused)")
+            if FRAME_MEMORY:
+                st.caption(f"League frame: {FRAME_MEMORY['before'] / 1e6:.1f} MB → "
+                           f"{FRAME_MEMORY['after'] / 1e6:.1f} MB after compaction")
+            st.dataframe(tdf, use_container_width=True, hide_index=True)
 
 
 if st.session_state.watchlist:
@@ -1557,31 +2374,53 @@ if st.session_state.watchlist:
                 _rerun()
 
 
+def scope_game_mask(scope, game_type="All Games"):
+    """Boolean mask over the games dimension for a Data Scope label + game type."""
+    games = DIMS['games']
+    if scope == "Career (All-Time)":
+        mask = pd.Series(True, index=games.index)
+    elif scope == "Career (QCL)":
+        mask = games['Era'] == 'QCL'
+    elif scope == "Career (SPAM)":
+        mask = games['Era'] == 'SPAM'
+    else:
+        mask = games['Season'] == _ordered_seasons[_season_labels.index(scope)]
+    if game_type != "All Games":
+        mask &= games['Game_Type'] == game_type
+    return mask
+
+
+
+
+def scope_rows(game_mask):
+    """full_df rows whose game is in the mask (gathered through GID)."""
+    return full_df[game_mask.to_numpy()[full_df['GID'].to_numpy()]]
+
+
+
+
 if scope_choice == "Career (All-Time)":
-    df_active = full_df.copy()
     selected_scope = "Career Stats"
     target_season = _qcl_seasons[0] if _qcl_seasons else _ordered_seasons[0]
     banner_text = "CAREER — ALL-TIME"
 elif scope_choice == "Career (QCL)":
-    df_active = full_df[full_df['Era'] == 'QCL'].copy()
     selected_scope = "Career Stats"
     target_season = _qcl_seasons[0] if _qcl_seasons else _ordered_seasons[0]
     banner_text = "CAREER — QCL"
 elif scope_choice == "Career (SPAM)":
-    df_active = full_df[full_df['Era'] == 'SPAM'].copy()
     selected_scope = "Career Stats"
     target_season = _spam_seasons[0] if _spam_seasons else _ordered_seasons[0]
     banner_text = "CAREER — SPAM"
 else:
     target_season = _ordered_seasons[_season_labels.index(scope_choice)]
-    df_active = full_df[full_df['Season'] == target_season].copy()
     selected_scope = "Season"   # sentinel: anything != "Career Stats"
     banner_text = scope_choice
 
 
 if game_type != "All Games":
-    df_active = df_active[df_active['Game_Type'] == game_type]
     banner_text += f" • {game_type.upper()}"
+game_mask = scope_game_mask(scope_choice, game_type)
+scope_games = int(game_mask.sum())
 
 
 st.markdown(f'<div class="header-banner">🏀 QCL LEAGUE HUB — {banner_text}</div>', unsafe_allow_html=True)
@@ -1591,7 +2430,7 @@ st.markdown(f'<div class="header-banner">🏀 QCL LEAGUE HUB — {banner_text}</
 st.image("Logo.png", width=120)
 
 
-if df_active.empty:
+if not scope_games:
     st.warning("No games match the current scope / game-type filter.")
     st.stop()
 
@@ -1601,42 +2440,120 @@ if df_active.empty:
 # =============================================================================
 # 8. CORE STAT ENGINE
 # =============================================================================
-full_p_df = full_df[full_df['Type'].astype(str).str.lower() == 'player'].copy()
+full_p_df = _player_rows(DATA_KEY)   # player-game facts (PID / TID / GID)
+
+
+
+
+# p_stats per-game means, in output column order: (output, source column)
+P_MEANS = [('PTS', 'PTS'), ('REB', 'REB'), ('AST', 'AST'), ('STL', 'STL'), ('BLK', 'BLK'), ('TO', 'TO'),
+           ('FGM', 'FGM'), ('FGA', 'FGA'), ('3PM', '3PM'), ('3PA', '3PA'), ('FTM', 'FTM'), ('FTA', 'FTA'),
+           ('PIE_Raw', 'PIE_Raw'), ('POS', 'Position_Num')]
+P_MEANS_2 = [('Tipped_Passes', 'Tipped_Passes'), ('Shots_Affected', 'Shots_Affected'),
+             ('FB_Points', 'FB_Points'), ('USG', 'USG_Game'), ('ORtg', 'ORtg_Game'), ('GmSc', 'Game_Score')]
+P_HIGHS = [('High_PTS', 'PTS'), ('High_REB', 'REB'), ('High_AST', 'AST'),
+           ('High_STL', 'STL'), ('High_BLK', 'BLK'), ('High_3PM', '3PM')]
+T_MEANS = [('PPG', 'PTS'), ('OppPPG', 'Opp_PTS'), ('Diff', 'Point_Diff'), ('Opp_PPP', 'Opp_PPP'),
+           ('SOS', 'SOS_Game'), ('Poss', 'Poss_Raw'), ('RPG', 'REB'), ('APG', 'AST'), ('SPG', 'STL'),
+           ('BPG', 'BLK'), ('TOPG', 'TO'), ('FGM', 'FGM'), ('FGA', 'FGA'), ('TPM', '3PM')]
+
+
 
 
+# all-time single-game highs, row = PID: scope-independent, so one max over every season block
+_at = group_reduce(SEASON_BLOCKS['players']['PID'], SEASON_BLOCKS['players'], maxes=['PTS_max', 'REB_max', 'AST_max'])
+AT_HIGHS = np.zeros((len(PLAYER_NAMES), 3), dtype=np.int64)
+AT_HIGHS[_at.index.to_numpy()] = _at.to_numpy()[:, :3]
 
 
-def compute_stats(scope_df, full_df, min_gp_filter=0):
+
+
+def _means(agg, pairs, den=None):
+    """{output: sum / count} from a group_reduce frame; count = `den` column or each source's non-null count."""
+    return {o: (agg[c] / agg[den or c + '_n']).to_numpy() for o, c in pairs}
+
+
+
+
+def compute_stats(scope_df, min_gp_filter=0):
     """Core stat engine. Identical math for regular season, playoffs, or any scope.
     Returns a dict of frames, or None if the scope lacks player/team rows."""
-    p_df = scope_df[scope_df['Type'].astype(str).str.lower() == 'player'].copy()
-    t_df = scope_df[scope_df['Type'].astype(str).str.lower() == 'team'].copy()
-    fp_df = full_df[full_df['Type'].astype(str).str.lower() == 'player'].copy()
+    p_df = scope_df[scope_df['Type'] == 'Player']
+    t_df = scope_df[scope_df['Type'] == 'Team']
+
+
+    if p_df.empty or t_df.empty:
+        return None
+
+
+    # one sort + reduceat pass per entity (stat_kernel) on the int32 PID / TID keys
+    p_keyed = p_df[p_df['PID'] >= 0]
+    mean_cols = [c for _, c in P_MEANS + P_MEANS_2]
+    agg = group_reduce(p_keyed['PID'], p_keyed, sums=mean_cols + ['Win'], counts=mean_cols,
+                       maxes=[c for _, c in P_HIGHS], distinct=p_keyed['GID'], last=['TID'])
+    p_stats = pd.DataFrame({'PID': agg.index.to_numpy(), 'GP': agg['n_distinct'].to_numpy(),
+                            **_means(agg, P_MEANS), 'TID': agg['TID_last'].to_numpy(),
+                            **_means(agg, P_MEANS_2), 'Wins': agg['Win'].to_numpy()})
+    p_highs = pd.DataFrame({o: agg[c + '_max'].to_numpy() for o, c in P_HIGHS})
+
+
+    t_cols = [c for _, c in T_MEANS]
+    agg = group_reduce(t_df['TID'], t_df, sums=t_cols + ['Win'], sumsq=['PTS'], counts=t_cols, distinct=t_df['GID'])
+    t_stats = pd.DataFrame({'TID': agg.index.to_numpy(), 'GP': agg['n_distinct'].to_numpy(),
+                            'Wins': agg['Win'].to_numpy(), **_means(agg, T_MEANS[:1]),
+                            'PTS_SD': sample_sd(agg['PTS'], agg['PTS_sq'], agg['PTS_n']),
+                            **_means(agg, T_MEANS[1:])})
+
+
+    p_stats, t_stats = _finish_stats(p_stats, p_highs, t_stats)
+    p_view = p_stats[p_stats['GP'] >= min_gp_filter]
 
 
+    return {'p_df': p_df, 't_df': t_df, 'p_stats': p_stats, 't_stats': t_stats, 'p_view': p_view}
+
+
+
+
+def stats_from_blocks(block_mask, p_df, t_df):
+    """compute_stats for a block-aligned scope, by adding season blocks instead of
+    regrouping raw rows. `block_mask` is a bool per BID; p_df / t_df are passed through."""
     if p_df.empty or t_df.empty:
         return None
+    pb, tb = SEASON_BLOCKS['players'], SEASON_BLOCKS['teams']
+    pb_in = pb[block_mask[pb['BID'].to_numpy()]]
+    pb_in = pb_in.iloc[np.argsort(pb_in['last_pos'].to_numpy(), kind='stable')]   # '_last' = latest block
+    tb_in = tb[block_mask[tb['BID'].to_numpy()]]
+
+
+    agg = group_reduce(pb_in['PID'], pb_in, sums=P_BLOCK_SUMS + ['n', 'GP'],
+                       maxes=[c + '_max' for _, c in P_HIGHS], last=['last_TID'])
+    p_stats = pd.DataFrame({'PID': agg.index.to_numpy(), 'GP': agg['GP'].to_numpy(),
+                            **_means(agg, P_MEANS, 'n'), 'TID': agg['last_TID_last'].to_numpy(),
+                            **_means(agg, P_MEANS_2, 'n'), 'Wins': agg['Win'].to_numpy()})
+    p_highs = pd.DataFrame({o: agg[c + '_max_max'].to_numpy() for o, c in P_HIGHS})
+
 
+    agg = group_reduce(tb_in['TID'], tb_in, sums=T_BLOCK_SUMS + T_BLOCK_NULLABLE + ['PTS_sq', 'n', 'GP']
+                       + [c + '_n' for c in T_BLOCK_NULLABLE])
+    t_stats = pd.DataFrame({'TID': agg.index.to_numpy(), 'GP': agg['GP'].to_numpy(),
+                            'Wins': agg['Win'].to_numpy(), **_means(agg, T_MEANS[:1], 'n'),
+                            'PTS_SD': sample_sd(agg['PTS'], agg['PTS_sq'], agg['n'])})
+    for o, c in T_MEANS[1:]:
+        t_stats[o] = _means(agg, [(o, c)], None if c in T_BLOCK_NULLABLE else 'n')[o]
 
-    p_all_time_highs = fp_df.groupby('Player/Team').agg(
-        AT_High_PTS=('PTS', 'max'), AT_High_REB=('REB', 'max'), AT_High_AST=('AST', 'max')
-    ).reset_index()
 
+    p_stats, t_stats = _finish_stats(p_stats, p_highs, t_stats)
+    return {'p_df': p_df, 't_df': t_df, 'p_stats': p_stats, 't_stats': t_stats, 'p_view': p_stats}
 
-    p_stats = p_df.groupby('Player/Team').agg(**{
-        'GP': ('GKey', 'nunique'),
-        'PTS': ('PTS', 'mean'), 'REB': ('REB', 'mean'), 'AST': ('AST', 'mean'),
-        'STL': ('STL', 'mean'), 'BLK': ('BLK', 'mean'), 'TO': ('TO', 'mean'),
-        'FGM': ('FGM', 'mean'), 'FGA': ('FGA', 'mean'),
-        '3PM': ('3PM', 'mean'), '3PA': ('3PA', 'mean'),
-        'FTM': ('FTM', 'mean'), 'FTA': ('FTA', 'mean'),
-        'PIE_Raw': ('PIE_Raw', 'mean'), 'POS': ('Position_Num', 'mean'),
-        'Team': ('Team Name', 'last'),
-        'Tipped_Passes': ('Tipped_Passes', 'mean'), 'Shots_Affected': ('Shots_Affected', 'mean'),
-        'FB_Points': ('FB_Points', 'mean'),
-        'USG': ('USG_Game', 'mean'), 'ORtg': ('ORtg_Game', 'mean'), 'GmSc': ('Game_Score', 'mean'),
-        'Wins': ('Win', 'sum'),
-    }).reset_index()
+
+
+
+def _finish_stats(p_stats, p_highs, t_stats):
+    """Names, rate stats, ranks and ratings on top of the per-player / per-team aggregates
+    (shared by the raw-row and the season-block paths). `p_highs` is row-aligned with
+    p_stats; clubs, all-time highs and team DRtg are gathered by PID / TID, not merged."""
+    p_stats.insert(0, 'Player/Team', PLAYER_NAMES[p_stats['PID']])
+    p_stats.insert(p_stats.columns.get_loc('TID'), 'Team', TEAM_NAMES[p_stats['TID']])
 
 
     p_stats.rename(columns={'PIE_Raw': 'PIE'}, inplace=True)
@@ -1652,16 +2569,12 @@ def compute_stats(scope_df, full_df, min_gp_filter=0):
                                (p_stats['FGM'] + 0.5 * p_stats['3PM']) / p_stats['FGA'] * 100, 0)
 
 
-    p_stats = p_stats.merge(player_clubs, on='Player/Team', how='left')
-    p_stats['Clubs'] = p_stats['Clubs'].apply(lambda x: x if isinstance(x, list) else [])
-
-
-    p_highs = p_df.groupby('Player/Team').agg(
-        High_PTS=('PTS', 'max'), High_REB=('REB', 'max'), High_AST=('AST', 'max'),
-        High_STL=('STL', 'max'), High_BLK=('BLK', 'max'), High_3PM=('3PM', 'max')
-    ).reset_index()
-    p_stats = p_stats.merge(p_highs, on='Player/Team', how='left')
-    p_stats = p_stats.merge(p_all_time_highs, on='Player/Team', how='left')
+    pid = p_stats['PID'].to_numpy()
+    p_stats['Clubs'] = CLUB_BITS[pid]
+    for o in p_highs.columns:
+        p_stats[o] = p_highs[o].to_numpy()
+    for j, o in enumerate(['AT_High_PTS', 'AT_High_REB', 'AT_High_AST']):
+        p_stats[o] = AT_HIGHS[pid, j]
 
 
     p_stats['FG%'] = (p_stats['FGM'] / p_stats['FGA'].replace(0, 1) * 100)
@@ -1680,14 +2593,7 @@ def compute_stats(scope_df, full_df, min_gp_filter=0):
 
 
     # --- TEAM STATS ---
-    t_stats = t_df.groupby('Team Name').agg(
-        GP=('GKey', 'nunique'), Wins=('Win', 'sum'), PPG=('PTS', 'mean'),
-        PTS_SD=('PTS', 'std'), OppPPG=('Opp_PTS', 'mean'),
-        Diff=('Point_Diff', 'mean'), Opp_PPP=('Opp_PPP', 'mean'), SOS=('SOS_Game', 'mean'),
-        Poss=('Poss_Raw', 'mean'), RPG=('REB', 'mean'), APG=('AST', 'mean'),
-        SPG=('STL', 'mean'), BPG=('BLK', 'mean'), TOPG=('TO', 'mean'),
-        FGM=('FGM', 'mean'), FGA=('FGA', 'mean'), TPM=('3PM', 'mean'),
-    ).reset_index()
+    t_stats.insert(0, 'Team Name', TEAM_NAMES[t_stats['TID']])
     t_stats['Win%'] = (t_stats['Wins'] / t_stats['GP'].replace(0, 1)).round(3)
     t_stats['DEF'] = t_stats['SPG'] + t_stats['BPG']
     t_stats['eFG%'] = np.where(t_stats['FGA'] > 0,
@@ -1704,9 +2610,9 @@ def compute_stats(scope_df, full_df, min_gp_filter=0):
 
     # --- PLAYER DRtg / NetRtg ---
     if not t_stats.empty:
-        p_stats = p_stats.merge(
-            t_stats[['Team Name', 'DRtg']].rename(columns={'Team Name': 'Team', 'DRtg': 'Team_DRtg'}),
-            on='Team', how='left')
+        team_drtg = np.full(len(TEAM_NAMES), np.nan)
+        team_drtg[t_stats['TID'].to_numpy()] = t_stats['DRtg'].to_numpy()
+        p_stats['Team_DRtg'] = team_drtg[p_stats['TID'].to_numpy()]
         lg_def = p_stats['DEF'].mean()
         p_stats['DRtg'] = (p_stats['Team_DRtg'].fillna(t_stats['DRtg'].mean())
                            - (p_stats['DEF'] - lg_def) * 2.0).round(1)
@@ -1715,20 +2621,114 @@ def compute_stats(scope_df, full_df, min_gp_filter=0):
     p_stats['NetRtg'] = (p_stats['ORtg'] - p_stats['DRtg']).round(1)
 
 
-    p_view = p_stats[p_stats['GP'] >= min_gp_filter].copy()
+    return p_stats, t_stats
+
+
+
+
+def scope_stats(game_mask):
+    """compute_stats for a games mask — added up from season blocks when the mask covers
+    whole blocks (every sidebar / playoff scope does), raw rows otherwise."""
+    if not game_mask.any():
+        return None
+    rows = scope_rows(game_mask)
+    per_block = game_mask.groupby(DIMS['games']['BID']).agg(['min', 'max'])
+    if (per_block['min'] == per_block['max']).all():
+        return stats_from_blocks(per_block['max'].to_numpy(dtype=bool),
+                                 rows[rows['Type'] == 'Player'], rows[rows['Type'] == 'Team'])
+    return compute_stats(rows, 0)
+
+
+
+
+def roster_index(p_stats):
+    """TID -> p_stats row positions in rotation order (GP, then PIE, then PTS, descending):
+    one sort per stats snapshot, so every rotation / roster lookup is a slice."""
+    by = (p_stats[['GP', 'PIE', 'PTS']].reset_index(drop=True)
+          .sort_values(['GP', 'PIE', 'PTS'], ascending=False, kind='stable').index)
+    return RowIndex(p_stats['TID'].to_numpy(), by=by.to_numpy())
+
+
+
+
+class StatCube:
+    """compute_stats (min GP 0) for every Data Scope × Game Type and playoff scope of one
+    data version, shared by all sessions. The requested cell is built on demand; a
+    background thread pre-fills the rest, so scope switches become dict lookups.
+    Cells are shared and read-only — callers filter them or take copy(deep=False)
+    before adding columns."""
+
+    def __init__(self):
+        self.cells = {}
+        self._thread = None
+
+    def get(self, cell, game_mask):
+        if cell not in self.cells:
+            s = scope_stats(game_mask)
+            if s is not None:
+                s['rosters'] = roster_index(s['p_stats'])
+            self.cells[cell] = s
+        return self.cells[cell]
+
+    def warm(self, all_masks):
+        """all_masks() -> {cell: game mask}; called once, on the first warm request."""
+        if self._thread is not None:
+            return
+        masks = all_masks()
+
+        def fill():
+            for cell, m in masks.items():
+                self.get(cell, m)
+        self._thread = threading.Thread(target=fill, name="qcl-stat-cube", daemon=True)
+        self._thread.start()
 
 
-    return {'p_df': p_df, 't_df': t_df, 'p_stats': p_stats, 't_stats': t_stats, 'p_view': p_view}
 
 
+def playoff_game_mask(season=None):
+    """Playoff games (Game_ID 9001-9999), one season or all-time."""
+    games = DIMS['games']
+    mask = (games['Game_ID'] >= 9001) & (games['Game_ID'] <= 9999)
+    return mask if season is None else mask & (games['Season'] == season)
 
 
-_S = compute_stats(df_active, full_df, min_gp_filter)
+
+
+def tournament_game_mask(season=None):
+    """Tournament games (Game_ID 8000-8999), one season or all-time."""
+    games = DIMS['games']
+    mask = (games['Game_ID'] >= 8000) & (games['Game_ID'] <= 8999)
+    return mask if season is None else mask & (games['Season'] == season)
+
+
+
+
+def bracket_field(game_mask):
+    """Names of the teams with a team-total row in any game of `game_mask`."""
+    rows = (full_df['Type'] == 'Team').to_numpy() & game_mask.to_numpy()[full_df['GID'].to_numpy()]
+    return set(TEAM_NAMES[np.unique(full_df['TID'].to_numpy()[rows])])
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _stat_cube(data_key):
+    return StatCube()
+
+
+
+
+stat_cube = _stat_cube(DATA_KEY)
+_S = stat_cube.get((scope_choice, game_type), game_mask)
+stat_cube.warm(lambda: {**{(sc, gt): scope_game_mask(sc, gt) for sc in scope_opts for gt in game_type_opts},
+                        **{('Playoffs', s): playoff_game_mask(s) for s in [None] + _ordered_seasons}})
 if _S is None:
     st.warning("Not enough player/team rows in this scope to build stats.")
     st.stop()
 p_df, t_df = _S['p_df'], _S['t_df']
-p_stats, t_stats, p_view = _S['p_stats'], _S['t_stats'], _S['p_view']
+p_stats, t_stats = _S['p_stats'], _S['t_stats']
+ROSTERS = _S['rosters']
+p_view = p_stats[p_stats['GP'] >= min_gp_filter]
 
 
 
@@ -1739,132 +2739,146 @@ p_stats, t_stats, p_view = _S['p_stats'], _S['t_stats'], _S['p_view']
 def get_rotation(team_name, size=ROTATION_SIZE, exclude=None):
     """Only five bodies play in Pro-Am. Rotation = most-used players by GAMES PLAYED,
     PIE as the tiebreak. Anyone in `exclude` is scratched."""
-    roster = p_stats[p_stats['Team'] == team_name].copy()
+    rows = ROSTERS.rows(TEAM_IDS.get(team_name, -1))
     if exclude:
-        roster = roster[~roster['Player/Team'].isin(exclude)]
-    roster = roster.sort_values(['GP', 'PIE', 'PTS'], ascending=[False, False, False])
-    return roster.head(size).reset_index(drop=True)
+        rows = rows[~np.isin(p_stats['Player/Team'].to_numpy()[rows], list(exclude))]
+    return p_stats.iloc[rows[:size]].reset_index(drop=True)
 
 
 
 
 def full_roster(team_name):
-    r = p_stats[p_stats['Team'] == team_name].copy()
-    return r.sort_values(['GP', 'PIE'], ascending=[False, False])
+    """The whole roster, in rotation order."""
+    return p_stats.iloc[ROSTERS.rows(TEAM_IDS.get(team_name, -1))]
 
 
 
 
-def run_monte_carlo(t1, t2, rot1, rot2, n_sims=2000, hca=1.5, star_conc=6.0,
-                    variance=1.0, seed=None):
-    """
-    Vectorized Monte Carlo over the two FIVE-MAN rotations.
+def roster_size(team_name):
+    return len(ROSTERS.rows(TEAM_IDS.get(team_name, -1)))
 
 
-    Team score model:
-        expected = PPG x opponent-defense factor x SOS adjustment
-                       x rotation-availability factor  ( +/- HCA )
-    Rotation availability = (sum of PPG of the five actually playing) /
-    (sum of PPG of the default healthy five). Scratch a star, the projected
-    score drops accordingly.
 
 
-    Player distribution: Dirichlet over the five rotation players' scoring
-    shares. `star_conc` controls how tightly the ball sticks to the usage
-    hierarchy (low = chaotic, high = the star always gets his).
-    """
-    rng = np.random.default_rng(seed)
+def rotation_avail(team, rot):
+    """Rotation availability: PPG of the five actually playing over the default healthy five's."""
+    base_sum = float(get_rotation(team)['PTS'].sum())
+    rot_sum = float(rot['PTS'].sum())
+    if base_sum <= 0:
+        return 1.0
+    return float(np.clip(rot_sum / base_sum, 0.55, 1.30))
 
 
-    d1 = t_stats[t_stats['Team Name'] == t1].iloc[0]
-    d2 = t_stats[t_stats['Team Name'] == t2].iloc[0]
+
+
+def matchup_model(home, away, hca=1.5, variance=1.0, av_home=1.0, av_away=1.0):
+    """The Oracle's team model for equal-length sequences of home / away team names:
+    ((exp_home, exp_away), (sd_home, sd_away)) as arrays, one entry per pairing."""
+    teams = t_stats.drop_duplicates('Team Name')
+    pos = pd.Index(teams['Team Name']).get_indexer
+    h, a = pos(list(home)), pos(list(away))
+    if (h < 0).any() or (a < 0).any():
+        raise ValueError("matchup_model: unknown team in this scope")
 
 
     lg_opp_ppp = t_stats['Opp_PPP'].mean()
     lg_opp_ppp = float(lg_opp_ppp) if pd.notna(lg_opp_ppp) and lg_opp_ppp > 0 else 1.0
+    opp = teams['Opp_PPP'].to_numpy(dtype=float)
+    dfac = np.where(opp > 0, opp / lg_opp_ppp, 1.0)          # NaN compares False -> 1.0
+    sosf = 1 + (teams['SOS'].fillna(0.5).to_numpy(dtype=float) - 0.5) * 0.5
+    ppg, sd = teams['PPG'].to_numpy(dtype=float), teams['PTS_SD'].to_numpy(dtype=float)
 
 
-    def dfac(row):
-        v = row['Opp_PPP']
-        return float(v / lg_opp_ppp) if pd.notna(v) and v > 0 else 1.0
+    exp_h = ppg[h] * dfac[a] * sosf[h] * np.asarray(av_home, dtype=float) + hca
+    exp_a = ppg[a] * dfac[h] * sosf[a] * np.asarray(av_away, dtype=float)
+    return (exp_h, exp_a), (sd[h] * variance, sd[a] * variance)
 
 
-    def1 = dfac(d2)   # defense that T1 faces
-    def2 = dfac(d1)   # defense that T2 faces
 
 
-    def avail(team, rot):
-        base = get_rotation(team)  # default healthy five
-        base_sum = float(base['PTS'].sum())
-        rot_sum = float(rot['PTS'].sum())
-        if base_sum <= 0:
-            return 1.0
-        return float(np.clip(rot_sum / base_sum, 0.55, 1.30))
+def score_alpha(rot, star_conc):
+    """Dirichlet concentrations over a rotation's scoring shares (PPG-weighted, floor 2%)."""
+    base = rot['PTS'].to_numpy(dtype=float)
+    if base.sum() <= 0:
+        base = np.ones(len(rot))
+    return np.clip(base / base.sum(), 0.02, None) * star_conc * len(rot)
 
 
-    av1, av2 = avail(t1, rot1), avail(t2, rot2)
 
 
-    sos1 = float(d1['SOS']) if pd.notna(d1['SOS']) else 0.5
-    sos2 = float(d2['SOS']) if pd.notna(d2['SOS']) else 0.5
+def mvp_impact(rot):
+    """Baseline (non-scoring) MVP impact of each rotation player."""
+    return (1.1 * rot['REB'].to_numpy(dtype=float)
+            + 1.4 * rot['AST'].to_numpy(dtype=float)
+            + 2.0 * rot['STL'].to_numpy(dtype=float)
+            + 2.0 * rot['BLK'].to_numpy(dtype=float))
 
 
-    exp1 = float(d1['PPG']) * def1 * (1 + (sos1 - 0.5) * 0.5) * av1 + hca
-    exp2 = float(d2['PPG']) * def2 * (1 + (sos2 - 0.5) * 0.5) * av2
 
 
-    sd1 = float(d1['PTS_SD']) * variance
-    sd2 = float(d2['PTS_SD']) * variance
+ORACLE_WORKERS = max(1, min(os.cpu_count() or 1, 8))   # processes for runs past 10,000 sims (1 = in-process)
+SIM_PLOT_CAP = 100_000                                  # sims sent to the browser per histogram
+ORACLE_CACHE_SIZE = 32                                  # compact Oracle results kept per data version
 
 
-    # ---- team scores ----
-    s1 = np.rint(rng.normal(exp1, sd1, n_sims)).astype(int)
-    s2 = np.rint(rng.normal(exp2, sd2, n_sims)).astype(int)
-    s1 = np.clip(s1, 25, None)
-    s2 = np.clip(s2, 25, None)
 
 
-    # ---- overtime: break ties with a coin-flip bucket ----
-    tie = s1 == s2
-    if tie.any():
-        flip = rng.random(int(tie.sum())) < 0.5
-        bump = rng.integers(2, 7, int(tie.sum()))
-        s1[tie] = s1[tie] + np.where(flip, bump, 0)
-        s2[tie] = s2[tie] + np.where(flip, 0, bump)
+@st.cache_resource(show_spinner=False)
+def _oracle_executor(workers):
+    """One process pool per worker count, shared by all sessions, its workers started up front.
+    Spawned workers import only oracle_pool (no Streamlit, no league data)."""
+    return start_pool(workers)
+
 
 
-    w1 = (s1 > s2)
+
+def run_monte_carlo(t1, t2, rot1, rot2, n_sims=2000, hca=1.5, star_conc=6.0,
+                    variance=1.0, seed=None, workers=0):
+    """
+    Vectorized Monte Carlo over the two FIVE-MAN rotations.
 
 
-    # ---- player scoring distribution over the five ----
-    def player_pts(rot, scores):
-        base = rot['PTS'].to_numpy(dtype=float)
-        if base.sum() <= 0:
-            base = np.ones(len(rot))
-        alpha = np.clip(base / base.sum(), 0.02, None) * star_conc * len(rot)
-        shares = rng.dirichlet(alpha, size=n_sims)           # (n_sims, k)
-        return shares * scores[:, None]
+    Team score model:
+        expected = PPG x opponent-defense factor x SOS adjustment
+                       x rotation-availability factor  ( +/- HCA )
+    Rotation availability = (sum of PPG of the five actually playing) /
+    (sum of PPG of the default healthy five). Scratch a star, the projected
+    score drops accordingly.
 
 
-    pp1 = player_pts(rot1, s1)
-    pp2 = player_pts(rot2, s2)
+    Player distribution: Dirichlet over the five rotation players' scoring
+    shares. `star_conc` controls how tightly the ball sticks to the usage
+    hierarchy (low = chaotic, high = the star always gets his).
 
 
-    # ---- MVP: scoring + baseline impact + winner bonus ----
-    def impact(rot):
-        return (1.1 * rot['REB'].to_numpy(dtype=float)
-                + 1.4 * rot['AST'].to_numpy(dtype=float)
-                + 2.0 * rot['STL'].to_numpy(dtype=float)
-                + 2.0 * rot['BLK'].to_numpy(dtype=float))
+    workers=0 draws every sim from one default_rng(seed) stream. workers >= 1 splits the
+    run into oracle_pool chunks with their own SeedSequence children, played over that
+    many processes (in-process for 1): same seed, same result, whatever the count.
+    """
+    av1, av2 = rotation_avail(t1, rot1), rotation_avail(t2, rot2)
+    (e1, e2), (v1, v2) = matchup_model([t1], [t2], hca, variance, av1, av2)
+    exp1, exp2, sd1, sd2 = float(e1[0]), float(e2[0]), float(v1[0]), float(v2[0])
 
 
-    m1 = pp1 + impact(rot1)[None, :] + np.where(w1, 4.0, 0.0)[:, None]
-    m2 = pp2 + impact(rot2)[None, :] + np.where(~w1, 4.0, 0.0)[:, None]
-    mvp_matrix = np.hstack([m1, m2])
+    # ---- team scores, Dirichlet scoring shares over the five, MVP (oracle_pool) ----
+    params = {'exp1': exp1, 'exp2': exp2, 'sd1': sd1, 'sd2': sd2,
+              'alpha1': score_alpha(rot1, star_conc), 'alpha2': score_alpha(rot2, star_conc),
+              'impact1': mvp_impact(rot1), 'impact2': mvp_impact(rot2)}
+    if workers > 1:
+        try:
+            g = play_games_pooled(params, n_sims, seed, _oracle_executor(workers))
+        except BrokenProcessPool:
+            # a worker died (OOM kill, ...): drop the dead pool, play this run in-process
+            _oracle_executor.clear()
+            g = play_games_pooled(params, n_sims, seed)
+    elif workers:
+        g = play_games_pooled(params, n_sims, seed)
+    else:
+        g = play_games(np.random.default_rng(seed), n_sims, **params)
+    s1, s2, pp1, pp2, mvp_counts = g['s1'], g['s2'], g['pp1'], g['pp2'], g['mvp_counts']
+    w1 = (s1 > s2)
     names = list(rot1['Player/Team']) + list(rot2['Player/Team'])
     teams = [t1] * len(rot1) + [t2] * len(rot2)
-    mvp_idx = mvp_matrix.argmax(axis=1)
-    mvp_counts = np.bincount(mvp_idx, minlength=len(names))
 
 
     return {
@@ -1883,11 +2897,377 @@ def run_monte_carlo(t1, t2, rot1, rot2, n_sims=2000, hca=1.5, star_conc=6.0,
 
 
 
-def projected_box(rot, pp):
-    """Median simulated points per player + season-average support stats."""
-    med = np.median(pp, axis=0).round(0).astype(int)
-    p20 = np.percentile(pp, 20, axis=0).round(0).astype(int)
-    p80 = np.percentile(pp, 80, axis=0).round(0).astype(int)
+def compact_result(res):
+    """What the Oracle view shows of a run_monte_carlo result, without the per-sim player
+    arrays: summary lines, box-score quantiles per player (median / p20 / p80 rows) and
+    at most SIM_PLOT_CAP sims for the charts."""
+    s1, s2, margin = res['s1'], res['s2'], res['margin']
+    box = lambda pp: np.vstack([np.median(pp, axis=0), np.percentile(pp, 20, axis=0),
+                                np.percentile(pp, 80, axis=0)])
+    return {'n': res['n'], 'exp1': res['exp1'], 'exp2': res['exp2'],
+            'win1': res['win1'], 'win2': res['win2'], 'avail': res['avail'], 'mvp': res['mvp'],
+            'med1': int(np.median(s1)), 'med2': int(np.median(s2)),
+            'spread': float(np.mean(margin)), 'total': float(np.mean(s1 + s2)),
+            'close': float((np.abs(margin) <= 5).mean() * 100),
+            'blow': float((np.abs(margin) >= 15).mean() * 100),
+            's1': s1[:SIM_PLOT_CAP].astype(np.int16), 's2': s2[:SIM_PLOT_CAP].astype(np.int16),
+            'margin': margin[:SIM_PLOT_CAP].astype(np.int16),
+            'box1': box(res['pp1']), 'box2': box(res['pp2'])}
+
+
+
+
+class SimCache:
+    """Bounded LRU of compact Oracle results, shared by every session of one data version.
+    Keys are sim_key hashes of everything that decides a run."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _sim_cache(data_key):
+    return SimCache(ORACLE_CACHE_SIZE)
+
+
+
+
+def sim_key(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+
+
+SLATE_CHUNK = 4_000_000   # player-score cells per simulate_slate block (~32 MB of float64)
+
+
+
+
+def simulate_slate(pairs, n_sims=2000, hca=1.5, star_conc=6.0, variance=1.0, seed=None,
+                   rotations=None):
+    """
+    Every (home, away) pairing in `pairs` simulated at once: team scores are a
+    (pairs x sims) tensor and the five-man scoring shares a (pairs x sims x five)
+    one, so a full round-robin costs one vectorized pass instead of a loop of
+    run_monte_carlo calls. Same team model, score draws and MVP rule.
+
+
+    Dirichlet shares are drawn as normalized gammas per game, side and sim, so games stay
+    independent, as separate run_monte_carlo calls would be. `rotations` ({team: rotation
+    frame}) overrides a team's default five, e.g. to carry the Oracle's scratches; every
+    team must field someone.
+
+
+    Returns {'n', 'games': one row per pairing (win %, median score, spread, total),
+    'mvp': one row per pairing x rotation player}.
+    """
+    rng = np.random.default_rng(seed)
+    pairs = [(h, a) for h, a in pairs]
+    if not pairs:
+        raise ValueError("simulate_slate: no pairings")
+    rotations = rotations or {}
+    names = list(dict.fromkeys(t for pair in pairs for t in pair))
+    rots = {t: rotations[t] if t in rotations else get_rotation(t) for t in names}
+    short = [t for t in names if rots[t].empty]
+    if short:
+        raise ValueError(f"simulate_slate: no available players for {', '.join(short)}")
+
+
+    # ---- per-team rotation matrices, padded to the widest five ----
+    k = max(len(r) for r in rots.values())
+    live = np.zeros((len(names), k), dtype=bool)
+    alpha = np.ones((len(names), k))
+    impact = np.full((len(names), k), -np.inf)   # padding never wins MVP
+    player = np.empty((len(names), k), dtype=object)
+    for i, t in enumerate(names):
+        r, n = rots[t], len(rots[t])
+        live[i, :n] = True
+        alpha[i, :n] = score_alpha(r, star_conc)
+        impact[i, :n] = mvp_impact(r)
+        player[i, :n] = r['Player/Team'].to_numpy()
+    av = np.array([rotation_avail(t, rots[t]) if t in rotations else 1.0 for t in names])
+
+
+    pos = {t: i for i, t in enumerate(names)}
+    h = np.array([pos[p[0]] for p in pairs])
+    a = np.array([pos[p[1]] for p in pairs])
+    (exp_h, exp_a), (sd_h, sd_a) = matchup_model([p[0] for p in pairs], [p[1] for p in pairs],
+                                                 hca, variance, av[h], av[a])
+
+
+    win = np.empty(len(pairs)); spread = np.empty(len(pairs)); total = np.empty(len(pairs))
+    med_h = np.empty(len(pairs), dtype=int); med_a = np.empty(len(pairs), dtype=int)
+    mvp_counts = np.empty((len(pairs), 2 * k), dtype=np.int64)
+    step = max(1, SLATE_CHUNK // (n_sims * 2 * k))
+    for lo in range(0, len(pairs), step):
+        sl = slice(lo, lo + step)
+        hi, ai, m = h[sl], a[sl], len(h[sl])
+        s1, s2 = draw_scores(rng, exp_h[sl, None], exp_a[sl, None], sd_h[sl, None], sd_a[sl, None],
+                             (m, n_sims))
+        w1 = s1 > s2
+
+
+        def side_mvp(ti, scores, won):   # one side's best player per sim: (slot, MVP score)
+            g = rng.standard_gamma(alpha[ti][:, None, :], (len(ti), n_sims, k))
+            g *= live[ti][:, None, :]
+            g *= (scores / g.sum(axis=2))[:, :, None]                  # Dirichlet shares x team score
+            g += impact[ti][:, None, :]
+            slot = g.argmax(axis=2)
+            return slot, np.take_along_axis(g, slot[:, :, None], axis=2)[:, :, 0] + 4.0 * won
+
+
+        (bh, mh), (ba, ma) = side_mvp(hi, s1, w1), side_mvp(ai, s2, ~w1)
+        best = np.where(mh >= ma, bh, k + ba)
+        best += (2 * k) * np.arange(m)[:, None]
+        mvp_counts[sl] = np.bincount(best.ravel(), minlength=m * 2 * k).reshape(m, 2 * k)
+        win[sl] = w1.mean(axis=1)
+        spread[sl] = (s1 - s2).mean(axis=1)
+        total[sl] = (s1 + s2).mean(axis=1)
+        med_h[sl] = np.median(s1, axis=1).astype(int)
+        med_a[sl] = np.median(s2, axis=1).astype(int)
+
+
+    games = pd.DataFrame({'Home': [p[0] for p in pairs], 'Away': [p[1] for p in pairs],
+                          'Home Win %': (win * 100).round(1), 'Away Win %': ((1 - win) * 100).round(1),
+                          'Home Score': med_h, 'Away Score': med_a,
+                          'Spread': spread.round(1), 'Total': total.round(1)})
+
+
+    keep = np.concatenate([live[h], live[a]], axis=1)                 # (pairs, 2k) slots
+    game = np.repeat(np.arange(len(pairs)), 2 * k).reshape(len(pairs), 2 * k)
+    team = np.repeat(np.array(pairs, dtype=object), k, axis=1)
+    mvp = pd.DataFrame({'Game': game[keep], 'Player': np.concatenate([player[h], player[a]], axis=1)[keep],
+                        'Team': team[keep], 'MVP %': (mvp_counts[keep] / n_sims * 100).round(1)})
+    mvp = (mvp.sort_values(['Game', 'MVP %'], ascending=[True, False], kind='stable')
+           .reset_index(drop=True))
+    return {'n': n_sims, 'games': games, 'mvp': mvp}
+
+
+
+
+@st.cache_data(ttl=60)
+def _load_schedule():
+    """Remaining games from schedule.json: [{"home": ..., "away": ...}] or [[home, away]]."""
+    sf = os.path.join(_ASSET_BASE, "schedule.json")
+    if not os.path.exists(sf):
+        return []
+    try:
+        with open(sf, "r", encoding="utf-8") as f:
+            games = json.load(f)
+        return [(str(g['home']), str(g['away'])) if isinstance(g, dict) else (str(g[0]), str(g[1]))
+                for g in games]
+    except Exception:
+        return []
+
+
+
+
+def round_robin(teams, cycles=1):
+    """Every pairing `cycles` times, home court alternating between cycles."""
+    return [(h, a) if c % 2 == 0 else (a, h)
+            for c in range(cycles) for i, h in enumerate(teams) for a in teams[i + 1:]]
+
+
+
+
+def simulate_season(pairs, n_seasons=10000, playoff_spots=4, hca=1.5, variance=1.0, seed=None):
+    """
+    Play the remaining games `pairs` ((home, away) names) out `n_seasons` times on top of
+    every t_stats team's current record, with the Oracle's team model at full health.
+    Games are a (games x seasons) score tensor; wins and point differential are summed
+    per team with one-hot matrix products. Seeds rank wins, then point differential.
+
+
+    Returns {'n', 'table': one row per team (current record, projected W-L, playoff and
+    top-seed odds), 'seeds': team x seed probability (%) matrix}.
+    """
+    rng = np.random.default_rng(seed)
+    teams = t_stats.drop_duplicates('Team Name')
+    names = teams['Team Name'].tolist()
+    pos = {t: i for i, t in enumerate(names)}
+    pairs = [(h, a) for h, a in pairs if h in pos and a in pos and h != a]
+    n_t = len(names)
+    gp0 = teams['GP'].to_numpy(dtype=float)
+    wins = np.repeat(teams['Wins'].to_numpy(dtype=float)[:, None], n_seasons, axis=1)
+    diff = np.repeat((teams['Diff'].to_numpy(dtype=float) * gp0)[:, None], n_seasons, axis=1)
+
+
+    if pairs:
+        h = np.array([pos[p[0]] for p in pairs])
+        a = np.array([pos[p[1]] for p in pairs])
+        (exp_h, exp_a), (sd_h, sd_a) = matchup_model([p[0] for p in pairs], [p[1] for p in pairs],
+                                                     hca, variance)
+        step = max(1, SLATE_CHUNK // n_seasons)
+        for lo in range(0, len(pairs), step):
+            sl = slice(lo, lo + step)
+            s1, s2 = draw_scores(rng, exp_h[sl, None], exp_a[sl, None], sd_h[sl, None], sd_a[sl, None],
+                                 (len(h[sl]), n_seasons))
+            hot_h = (h[sl][:, None] == np.arange(n_t)).astype(float)   # (games, teams)
+            hot_a = (a[sl][:, None] == np.arange(n_t)).astype(float)
+            w1 = (s1 > s2).astype(float)
+            margin = (s1 - s2).astype(float)
+            wins += hot_h.T @ w1 + hot_a.T @ (1.0 - w1)
+            diff += hot_h.T @ margin - hot_a.T @ margin
+    left = np.bincount(np.r_[h, a], minlength=n_t) if pairs else np.zeros(n_t, dtype=int)
+
+
+    order = np.lexsort((-diff.T, -wins.T), axis=-1)                     # (seasons, teams), best first
+    seed_of = np.empty_like(order)
+    np.put_along_axis(seed_of, order, np.arange(n_t)[None, :], axis=1)  # seed_of[sim, team]
+    seed_pct = (np.bincount((np.arange(n_t)[None, :] * n_t + seed_of).ravel(), minlength=n_t * n_t)
+                .reshape(n_t, n_t) / n_seasons * 100)
+
+
+    proj_w = wins.mean(axis=1)
+    table = pd.DataFrame({'Team': names, 'W': teams['Wins'].to_numpy(dtype=int),
+                          'L': (gp0 - teams['Wins'].to_numpy(dtype=float)).astype(int), 'Left': left,
+                          'Proj W': proj_w.round(1), 'Proj L': (gp0 + left - proj_w).round(1),
+                          'Playoff %': seed_pct[:, :min(playoff_spots, n_t)].sum(axis=1).round(1),
+                          'Top Seed %': seed_pct[:, 0].round(1),
+                          'Avg Seed': ((seed_of + 1).mean(axis=0)).round(2)})
+    seeds = pd.DataFrame(seed_pct.round(1), index=pd.Index(names, name='Team'),
+                         columns=[f"#{i + 1}" for i in range(n_t)])
+    return {'n': n_seasons, 'table': table, 'seeds': seeds}
+
+
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def season_odds(data_key, scope, game_type, remaining, n_seasons, playoff_spots, seed=0):
+    """simulate_season memoized, so a rerun of the page does not replay it. It reads the
+    scope's t_stats: data_key + scope + game_type stand in for them in the key."""
+    return simulate_season(remaining, n_seasons=n_seasons, playoff_spots=playoff_spots, seed=seed)
+
+
+
+
+def series_home(best_of):
+    """Games of a best-of-N series the higher seed hosts: 2-2-1-1-1 from best-of-5 up,
+    alternating (higher seed first) below that."""
+    if best_of >= 5:
+        return [True, True, False, False] + [g % 2 == 0 for g in range(best_of - 4)]
+    return [g % 2 == 0 for g in range(best_of)]
+
+
+
+
+def bracket_order(size):
+    """Seed index in each bracket slot (1 v N, then 2 v N-1 on the far side, ...)."""
+    order = [0]
+    while len(order) < size:
+        order = [x for s in order for x in (s, 2 * len(order) - 1 - s)]
+    return order
+
+
+
+
+def bracket_round_name(rounds_left):
+    """Column label for reaching the stage with `rounds_left` rounds still to play."""
+    return {0: 'Title', 1: 'Final', 2: 'Semis', 3: 'Quarters'}.get(rounds_left, f"Last {2 ** rounds_left}")
+
+
+
+
+def simulate_bracket(seeds, best_of=7, n_sims=10000, hca=1.5, variance=1.0, seed=None, top_paths=5):
+    """
+    Single-elimination bracket of best-of-N series over `seeds` (team names, #1 first),
+    played `n_sims` times. The field is padded to a power of two with byes for the top
+    seeds; `best_of` is one N or one per round. Each game is the Oracle's score draw
+    (matchup_model + draw_scores) with the higher seed hosting per series_home — every
+    series of a round, across all sims, is one (sims x series) array per game. The
+    series goes to whoever takes the majority of N games, which is the same winner
+    as first-to-(N+1)/2.
+
+
+    Returns {'n', 'table': one row per team (seed, % reaching each round, title %),
+    'paths': the most frequent complete brackets with their probability}.
+    """
+    rng = np.random.default_rng(seed)
+    seeds = list(seeds)
+    n_t = len(seeds)
+    if n_t < 2:
+        raise ValueError("simulate_bracket: need at least two teams")
+    rounds = int(np.ceil(np.log2(n_t)))
+    size = 2 ** rounds
+    best_of = [best_of] * rounds if np.isscalar(best_of) else list(best_of)
+
+
+    # per-game model for every ordered (home, away) pair of the field
+    hh, aa = np.meshgrid(np.arange(n_t), np.arange(n_t), indexing='ij')
+    (exp_h, exp_a), (sd_h, sd_a) = matchup_model([seeds[i] for i in hh.ravel()], [seeds[j] for j in aa.ravel()],
+                                                 hca, variance)
+    exp_h, exp_a, sd_h, sd_a = (x.reshape(n_t, n_t) for x in (exp_h, exp_a, sd_h, sd_a))
+
+
+    slots = np.array([i if i < n_t else -1 for i in bracket_order(size)])
+    cur = np.repeat(slots[None, :], n_sims, axis=0)                    # (sims, slots), -1 = bye
+    reach = np.zeros((n_t, rounds))
+    picks = []
+    for r in range(rounds):
+        a, b = cur[:, 0::2], cur[:, 1::2]
+        hi = np.where((b < 0) | ((a >= 0) & (a < b)), a, b)              # better seed of each series
+        lo = np.where(hi == a, b, a)
+        real = lo >= 0
+        lo_ix = np.maximum(lo, 0)
+        hi_wins = np.zeros(hi.shape, dtype=int)
+        for hi_home in series_home(best_of[r]):
+            h, v = (hi, lo_ix) if hi_home else (lo_ix, hi)
+            s1, s2 = draw_scores(rng, exp_h[h, v], exp_a[h, v], sd_h[h, v], sd_a[h, v], hi.shape)
+            hi_wins += (s1 > s2) if hi_home else (s2 > s1)
+        cur = np.where(real & (hi_wins <= best_of[r] // 2), lo, hi)
+        reach[:, r] = np.bincount(cur.ravel(), minlength=n_t) / n_sims * 100
+        picks.append(cur)
+
+
+    table = pd.DataFrame({'Seed': np.arange(1, n_t + 1), 'Team': seeds})
+    for r in range(rounds):
+        table[f"{bracket_round_name(rounds - r - 1)} %"] = reach[:, r].round(1)
+
+
+    paths, counts = np.unique(np.concatenate(picks, axis=1), axis=0, return_counts=True)
+    top = np.argsort(-counts, kind='stable')[:top_paths]
+    cuts = np.cumsum([size >> (r + 1) for r in range(rounds)])[:-1]
+    paths = pd.DataFrame({
+        'Prob %': (counts[top] / n_sims * 100).round(2),
+        'Champion': [seeds[paths[i, -1]] for i in top],
+        'Path': [" | ".join(", ".join(seeds[t] for t in rnd) for rnd in np.split(paths[i], cuts))
+                 for i in top]})
+    return {'n': n_sims, 'table': table, 'paths': paths}
+
+
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def bracket_odds(data_key, scope, game_type, seeds, best_of, n_sims, hca, seed=0):
+    """simulate_bracket memoized like season_odds: data_key + scope + game_type stand in
+    for the t_stats its team model reads."""
+    return simulate_bracket(list(seeds), best_of=best_of, n_sims=n_sims, hca=hca, seed=seed)
+
+
+
+
+def projected_box(rot, box):
+    """Median simulated points per player + season-average support stats. `box` is
+    compact_result's (median, p20, p80) x player quantiles."""
+    med, p20, p80 = np.asarray(box).round(0).astype(int)
     return pd.DataFrame({
         'Player': rot['Player/Team'],
         'GP': rot['GP'].astype(int),
@@ -2277,7 +3657,7 @@ def render_merged_cards_v2():
 
 if view_mode == "🏠 League Home & Awards":
     hc1, hc2, hc3, hc4 = st.columns(4)
-    hc1.markdown(f"<div class='metric-box'><div class='metric-title'>Games Logged</div><div class='metric-value'>{df_active['GKey'].nunique()}</div></div>", unsafe_allow_html=True)
+    hc1.markdown(f"<div class='metric-box'><div class='metric-title'>Games Logged</div><div class='metric-value'>{scope_games}</div></div>", unsafe_allow_html=True)
     hc2.markdown(f"<div class='metric-box'><div class='metric-title'>Active Players</div><div class='metric-value'>{p_stats['Player/Team'].nunique()}</div></div>", unsafe_allow_html=True)
     hc3.markdown(f"<div class='metric-box'><div class='metric-title'>Teams</div><div class='metric-value'>{t_stats['Team Name'].nunique()}</div></div>", unsafe_allow_html=True)
     hc4.markdown(f"<div class='metric-box'><div class='metric-title'>League PPG</div><div class='metric-value'>{fnum(t_stats['PPG'].mean()):.1f}</div></div>", unsafe_allow_html=True)
@@ -2340,19 +3720,9 @@ if view_mode == "🏠 League Home & Awards":
             st.info("MIP requires a previous season for comparison.")
         else:
             prev_s = max(prev_seasons)
-
-
-            def season_line(s):
-                d = full_p_df[full_p_df['Season'] == s]
-                return d.groupby('Player/Team').agg(GP=('GKey', 'nunique'),
-                                                    PIE=('PIE_Raw', 'mean'),
-                                                    PTS=('PTS', 'mean')).reset_index()
-
-
-            mip = season_line(target_season).merge(season_line(prev_s), on='Player/Team',
-                                                   suffixes=('', '_Prev'))
-            mip = mip[(mip['GP'] >= 3) & (mip['GP_Prev'] >= 3)]
-            mip['Jump'] = mip['PIE'] - mip['PIE_Prev']
+            deltas = season_deltas(DATA_KEY, SEASON_BLOCKS, DIMS)
+            mip = deltas[(deltas['Season'] == target_season) & (deltas['Season_Prev'] == prev_s)
+                         & (deltas['GP'] >= 3) & (deltas['GP_Prev'] >= 3)]
             mip = mip.sort_values('Jump', ascending=False)
             if mip.empty:
                 st.info("No players with 3+ games in both seasons yet.")
@@ -2369,6 +3739,26 @@ if view_mode == "🏠 League Home & Awards":
                             f"<p>{r['PIE_Prev']:.1f} → {r['PIE']:.1f} PIE | {r['PTS']:.1f} PPG now</p></div>",
                             unsafe_allow_html=True)
                 dl(mip[['Player/Team', 'PIE_Prev', 'PIE', 'Jump']], "⬇️ MIP race CSV", "mip_race.csv", "dl_mip")
+                drops = mip[mip['Jump'] < 0].sort_values('Jump').head(5)
+                if not drops.empty:
+                    st.markdown("##### 📉 Biggest Drop-offs")
+                    st.dataframe(drops[['Player/Team', 'PIE_Prev', 'PIE', 'Jump', 'PTS_Jump']].round(1),
+                                 use_container_width=True, hide_index=True)
+        with st.expander("🏛️ MIP History"):
+            deltas = season_deltas(DATA_KEY, SEASON_BLOCKS, DIMS)
+            league_prev = dict(zip(sorted(seasons)[1:], sorted(seasons)[:-1]))
+            hist = deltas[(deltas['Season_Prev'] == deltas['Season'].map(league_prev))
+                          & (deltas['GP'] >= 3) & (deltas['GP_Prev'] >= 3)]
+            hist = hist.sort_values('Jump', ascending=False).drop_duplicates('Season').sort_values('Season', ascending=False)
+            if hist.empty:
+                st.info("No season has an MIP race yet.")
+            else:
+                st.dataframe(pd.DataFrame({'Season': [_season_label(x) for x in hist['Season']],
+                                           'MIP': hist['Player/Team'].to_numpy(),
+                                           'From': [_season_label(x) for x in hist['Season_Prev']],
+                                           'PIE': hist['PIE'].round(1).to_numpy(),
+                                           'Jump': hist['Jump'].round(1).to_numpy()}),
+                             use_container_width=True, hide_index=True)
     with a_tabs[5]:
         st.markdown("#### 🏅 All-League Teams")
         _al_data = _load_allleague().get(str(target_season), {})
@@ -2437,9 +3827,9 @@ if view_mode == "🏠 League Home & Awards":
     st.markdown("<hr>", unsafe_allow_html=True)
     st.markdown("### 🔥 Streak Trends")
     look = st.slider("Form window (games)", 2, 8, 3)
-    recent_p = p_df.sort_values(['Player/Team', 'Season', 'Game_ID']).groupby('Player/Team').tail(look)
-    recent_stats = recent_p.groupby('Player/Team').agg(Recent_PIE=('PIE_Raw', 'mean')).reset_index()
-    trend = p_stats.merge(recent_stats, on='Player/Team')
+    recent = _form_engine(DATA_KEY).windows(look, (scope_choice, game_type), game_mask)
+    trend = p_stats.merge(recent[['PIE_Raw_recent']].rename(columns={'PIE_Raw_recent': 'Recent_PIE'}),
+                          left_on='PID', right_index=True)
     trend = trend[trend['GP'] >= max(look, 2)]
     trend['Swing'] = trend['Recent_PIE'] - trend['PIE']
 
@@ -2474,7 +3864,7 @@ elif view_mode == "🏆 Power Rankings & SOS":
     tot_w = max(w_win + w_sos + w_net, 0.01)
 
 
-    ranks = t_stats.copy()
+    ranks = t_stats.copy(deep=False)
     net_span = max(float(ranks['NetRtg'].max() - ranks['NetRtg'].min()), 0.01)
     net_norm = (ranks['NetRtg'] - ranks['NetRtg'].min()) / net_span
     ranks['True_Power'] = ((ranks['Win%'] * w_win) + (ranks['SOS'].fillna(0.5) * w_sos) + (net_norm * w_net)) / tot_w
@@ -2482,7 +3872,7 @@ elif view_mode == "🏆 Power Rankings & SOS":
 
 
     form_map, streak_map, win_streak_len = {}, {}, {}
-    for team, g in t_df.sort_values(['Season', 'Game_ID']).groupby('Team Name'):
+    for team, g in t_df.sort_values(['Season', 'Game_ID']).groupby('Team Name', observed=True):
         seq = [int(w) for w in g['Win'].tolist()]
         if not seq:
             form_map[team], streak_map[team], win_streak_len[team] = "-", "-", 0
@@ -2523,6 +3913,37 @@ elif view_mode == "🏆 Power Rankings & SOS":
        "⬇️ Power rankings CSV", "power_rankings.csv", "dl_pr")
 
 
+    st.markdown("<hr>", unsafe_allow_html=True)
+    st.markdown("#### 🔮 Season Simulator")
+    schedule = _load_schedule()
+    sc1, sc2, sc3 = st.columns(3)
+    src_opts = (["schedule.json (remaining games)"] if schedule else []) + ["Round-robin"]
+    src = sc1.selectbox("Remaining games", src_opts, key="ssim_src")
+    n_seasons = sc2.select_slider("Seasons", [1000, 2500, 5000, 10000], value=10000, key="ssim_n")
+    spots = sc3.number_input("Playoff spots", 1, max(len(ranks), 1), min(4, max(len(ranks), 1)), key="ssim_spots")
+    if src == "Round-robin":
+        cycles = st.slider("Games vs each opponent", 1, 4, 1, key="ssim_cycles")
+        remaining = round_robin(ranks['Team Name'].tolist(), cycles)
+    else:
+        remaining = schedule
+    if ranks.empty:
+        st.info("No teams in this scope.")
+    else:
+        sim = season_odds(DATA_KEY, scope_choice, game_type, tuple(remaining), n_seasons, int(spots))
+        board = (sim['table'].set_index('Team').reindex(ranks['Team Name']).reset_index()
+                 .rename(columns={'Team Name': 'Team'}))
+        st.dataframe(board, use_container_width=True, hide_index=True)
+        st.caption(f"{sim['n']:,} simulated seasons of {int(board['Left'].sum()) // 2} remaining games "
+                   f"with the Oracle's team model at full health. Seeds break ties on point differential.")
+        sfig = px.imshow(sim['seeds'].reindex(ranks['Team Name']), text_auto=True, aspect='auto',
+                         color_continuous_scale='YlOrBr', template='plotly_dark',
+                         labels=dict(x='Seed', y='', color='%'), title="Seed Distribution (%)")
+        sfig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                           height=max(300, 28 * len(ranks)))
+        st.plotly_chart(sfig, use_container_width=True)
+        dl(board, "⬇️ Season odds CSV", "season_odds.csv", "dl_ssim")
+
+
 
 
 # ----------------------------------------------------------- FRANCHISE HUB ---
@@ -2541,8 +3962,8 @@ elif view_mode == "🏢 Franchise Hub":
                     unsafe_allow_html=True)
 
 
-        t_data = t_df[t_df['Team Name'] == sel_team]
-        p_data = p_df[p_df['Team Name'] == sel_team]
+        t_data = entity_rows('team', TEAM_IDS.get(sel_team), game_mask)
+        p_data = entity_rows('roster', TEAM_IDS.get(sel_team), game_mask)
         t_hit = t_stats[t_stats['Team Name'] == sel_team]
 
 
@@ -2644,7 +4065,8 @@ elif view_mode == "🏢 Franchise Hub":
                 else:
                     sel_game = st.selectbox("Select Game", game_opts,
                                             format_func=lambda t: f"S{int(t[0])} • Game {int(t[1])}")
-                    g_data = p_data[(p_data['Season'] == sel_game[0]) & (p_data['Game_ID'] == sel_game[1])]
+                    g_data = entity_rows('game', GAME_IDS.get(sel_game))
+                    g_data = g_data[(g_data['Type'] == 'Player') & (g_data['TID'] == TEAM_IDS.get(sel_team))]
                     if not g_data.empty:
                         potg = g_data.loc[g_data['PIE_Raw'].idxmax()]
                         opp = g_data['Opp_Name'].iloc[0] if 'Opp_Name' in g_data.columns else None
@@ -2677,7 +4099,7 @@ elif view_mode == "🔦 Player Spotlight":
             st.session_state.watchlist and st.session_state.watchlist[0] in names) else 0
         sel = st.selectbox("Player", names, index=default_i)
         row = p_stats[p_stats['Player/Team'] == sel].iloc[0]
-        logs = p_df[p_df['Player/Team'] == sel].sort_values(['Season', 'Game_ID']).reset_index(drop=True)
+        logs = entity_rows('player', PLAYER_IDS.get(sel), game_mask).sort_values(['Season', 'Game_ID']).reset_index(drop=True)
 
 
         render_rotating_card(sel, key="spotlight", team=row.get('Team'))
@@ -2721,7 +4143,7 @@ elif view_mode == "🔦 Player Spotlight":
         with s2:
             st.markdown("**By Opponent**")
             if 'Opp_Name' in logs.columns and logs['Opp_Name'].notna().any():
-                opp = logs[logs['Opp_Name'].notna()].groupby('Opp_Name').agg(
+                opp = logs[logs['Opp_Name'].notna()].groupby('Opp_Name', observed=True).agg(
                     GP=('GKey', 'nunique'), PTS=('PTS', 'mean'), PIE=('PIE_Raw', 'mean')).reset_index()
                 st.dataframe(opp.round(1).sort_values('PIE', ascending=False),
                              use_container_width=True, hide_index=True)
@@ -2732,7 +4154,7 @@ elif view_mode == "🔦 Player Spotlight":
         st.markdown("### 📓 Game Log")
         cols = [c for c in ['Season', 'Game_ID', 'Opp_Name', 'Win', 'PTS', 'REB', 'AST', 'STL', 'BLK',
                             'FGM', 'FGA', '3PM', '3PA', 'TO', 'PIE_Raw', 'Game_Score'] if c in logs.columns]
-        show = logs[cols].copy()
+        show = logs[cols]
         show['Win'] = show['Win'].map({1: 'W', 0: 'L'})
         st.dataframe(show.round(1), use_container_width=True, hide_index=True)
         dl(show, "⬇️ Game log CSV", f"{sel}_gamelog.csv", "dl_log")
@@ -2752,7 +4174,7 @@ elif view_mode == "🗃️ Full Player Database":
                                        'USG', 'TS%', 'GP'], index=0)
 
 
-    view = p_view.copy()
+    view = p_view.copy(deep=False)
     if q:
         view = view[view['Player/Team'].str.contains(q, case=False, na=False)]
     if team_filter:
@@ -2896,14 +4318,14 @@ elif view_mode == "🥊 Rivalry Corner":
     min_meets = st.slider("Minimum meetings to qualify as a rivalry", 2, 10, 4)
 
 
-    matchups = full_df[full_df['Type'].astype(str).str.lower() == 'team'].copy()
+    matchups = full_df[full_df['Type'].astype(str).str.lower() == 'team']
     if 'Opp_Name' not in matchups.columns or matchups['Opp_Name'].isna().all():
         st.info("No head-to-head matchup data available yet.")
     else:
         matchups = matchups[matchups['Opp_Name'].notna()]
         matchups['Pairing'] = matchups.apply(
             lambda r: " vs ".join(sorted([str(r['Team Name']), str(r['Opp_Name'])])), axis=1)
-        rivals = matchups.groupby('Pairing').agg(Games=('GKey', 'nunique')).reset_index()
+        rivals = matchups.groupby('Pairing', observed=True).agg(Games=('GKey', 'nunique')).reset_index()
         rivals = rivals[rivals['Games'] >= min_meets].sort_values('Games', ascending=False)
 
 
@@ -2942,19 +4364,14 @@ elif view_mode == "🏆 Playoffs":
                 "Game Type filter.)")
 
 
-    if selected_scope == "Career Stats":
-        po_scope = full_df
-    else:
-        po_scope = full_df[full_df['Season'] == target_season]
-
-
-    po_src = po_scope[(po_scope['Game_ID'] >= 9001) & (po_scope['Game_ID'] <= 9999)]
+    po_season = None if selected_scope == "Career Stats" else target_season
+    po_mask = playoff_game_mask(po_season)
 
 
-    if po_src.empty:
+    if not po_mask.any():
         st.info("No playoff games logged in this scope yet (playoffs = Game_ID 9001–9999).")
     else:
-        PO = compute_stats(po_src, full_df, min_gp_filter=0)
+        PO = stat_cube.get(('Playoffs', po_season), po_mask)
         if PO is None:
             st.warning("Playoff games found, but not enough player/team rows to build stats.")
         else:
@@ -2963,7 +4380,7 @@ elif view_mode == "🏆 Playoffs":
 
 
             m1, m2, m3, m4 = st.columns(4)
-            m1.markdown(f"<div class='metric-box'><div class='metric-title'>Playoff Games</div><div class='metric-value'>{po_src['GKey'].nunique()}</div></div>", unsafe_allow_html=True)
+            m1.markdown(f"<div class='metric-box'><div class='metric-title'>Playoff Games</div><div class='metric-value'>{int(po_mask.sum())}</div></div>", unsafe_allow_html=True)
             m2.markdown(f"<div class='metric-box'><div class='metric-title'>Players</div><div class='metric-value'>{po_p_stats['Player/Team'].nunique()}</div></div>", unsafe_allow_html=True)
             m3.markdown(f"<div class='metric-box'><div class='metric-title'>Teams</div><div class='metric-value'>{po_t_stats['Team Name'].nunique()}</div></div>", unsafe_allow_html=True)
             m4.markdown(f"<div class='metric-box'><div class='metric-title'>Playoff PPG</div><div class='metric-value'>{fnum(po_t_stats['PPG'].mean()):.1f}</div></div>", unsafe_allow_html=True)
@@ -2990,7 +4407,7 @@ elif view_mode == "🏆 Playoffs":
 
 
                 st.markdown("#### Totals")
-                po_tot = po_p_df.groupby('Player/Team').sum(numeric_only=True).reset_index()
+                po_tot = po_p_df.groupby('Player/Team', observed=True).sum(numeric_only=True).reset_index()
                 tc1, tc2, tc3 = st.columns(3)
                 tc1.markdown(generate_mini_leaderboard("Total PTS", po_tot, 'PTS', "#cc0000", depth, "Player/Team"), unsafe_allow_html=True)
                 tc2.markdown(generate_mini_leaderboard("Total REB", po_tot, 'REB', "#32cd32", depth, "Player/Team"), unsafe_allow_html=True)
@@ -3003,7 +4420,7 @@ elif view_mode == "🏆 Playoffs":
                 q = f1.text_input("🔍 Search player", key="po_pq")
                 sort_by = f2.selectbox("Sort by", ['PIE', 'PTS', 'REB', 'AST', 'DEF', 'GmSc',
                                                    'NetRtg', 'USG', 'TS%', 'GP'], index=0, key="po_sort")
-                view = po_p_stats.copy()
+                view = po_p_stats.copy(deep=False)
                 if q:
                     view = view[view['Player/Team'].str.contains(q, case=False, na=False)]
                 view = view.sort_values(sort_by, ascending=False)
@@ -3031,7 +4448,7 @@ elif view_mode == "🏆 Playoffs":
                              f"<td style='color:{nc}; font-weight:bold;'>{r['NetRtg']:+.1f}</td>"
                              f"<td>{r['Pace']:.1f}</td></tr>")
                 st.markdown(html + "</table>", unsafe_allow_html=True)
-                dl(po_t_stats, "⬇️ Playoff team stats CSV", "qcl_playoff_teams.csv", "dl_po_teams")
+                dl(po_t_stats.drop(columns="TID"), "⬇️ Playoff team stats CSV", "qcl_playoff_teams.csv", "dl_po_teams")
 
 
                 st.markdown("##### 💥 Biggest Playoff Blowouts")
@@ -3068,6 +4485,48 @@ elif view_mode == "🏆 Playoffs":
 
 
 
+    st.markdown("<hr>", unsafe_allow_html=True)
+    st.markdown("#### 🎲 Bracket Simulator")
+    st.caption("Seeds come from the sidebar scope's standings (Win%, then NetRtg); every game is an "
+               "Oracle score draw with the higher seed hosting games 1-2, 5 and 7.")
+    bk1, bk2, bk3 = st.columns(3)
+    bracket_kind = bk1.radio("Bracket", ["Playoffs (Game_ID 9001–9999)", "Tournament (Game_ID 8000s)"],
+                             key="bk_kind")
+    is_tourney = bracket_kind.startswith("Tournament")
+    field = bracket_field(tournament_game_mask(po_season) if is_tourney else po_mask)
+    standings = t_stats.sort_values(['Win%', 'NetRtg'], ascending=False)['Team Name'].tolist()
+    field_src = bk2.radio("Field", (["Current field"] if field & set(standings) else []) + ["Top N by record"],
+                          key="bk_field")
+    if field_src == "Current field":
+        bracket_seeds = [t for t in standings if t in field]
+    else:
+        top_n = bk3.number_input("Teams", 2, max(len(standings), 2), min(8, max(len(standings), 2)), key="bk_n")
+        bracket_seeds = standings[:int(top_n)]
+    bs1, bs2, bs3 = st.columns(3)
+    bk_best_of = bs1.select_slider("Best of", [1, 3, 5, 7], value=1 if is_tourney else 7,
+                                  key=f"bk_bo_{is_tourney}")
+    bk_sims = bs2.select_slider("Brackets", [1000, 2500, 5000, 10000], value=10000, key="bk_sims")
+    bk_hca = bs3.slider("Home court edge (pts)", 0.0, 5.0, 0.0 if is_tourney else 1.5, 0.5,
+                       key=f"bk_hca_{is_tourney}")
+    if len(bracket_seeds) < 2:
+        st.info("Need at least two teams in the field.")
+    else:
+        bsim = bracket_odds(DATA_KEY, scope_choice, game_type, tuple(bracket_seeds), bk_best_of, bk_sims, bk_hca)
+        st.dataframe(bsim['table'], use_container_width=True, hide_index=True)
+        bfig = px.bar(bsim['table'].sort_values('Title %'), x='Title %', y='Team', orientation='h',
+                      template='plotly_dark', title=f"Title Odds — {bsim['n']:,} brackets")
+        bfig.update_traces(marker_color=GOLD)
+        bfig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                           height=max(260, 30 * len(bracket_seeds)))
+        st.plotly_chart(bfig, use_container_width=True)
+        st.markdown("##### 🧭 Most Likely Brackets")
+        st.dataframe(bsim['paths'], use_container_width=True, hide_index=True)
+        st.caption("Path = the winners of each round, left to right.")
+        dl(bsim['table'], "⬇️ Bracket odds CSV", "bracket_odds.csv", "dl_bracket")
+
+
+
+
 # ------------------------------------------------------- ORACLE PREDICTOR ----
 elif view_mode == "🔮 Oracle Predictor":
     st.subheader("🔮 QCL Oracle — Monte Carlo Matchup Engine")
@@ -3075,7 +4534,7 @@ elif view_mode == "🔮 Oracle Predictor":
                 "by games played — not the whole roster. Scratch a starter and the projection moves.")
 
 
-    fieldable = [t for t in t_stats['Team Name'] if not get_rotation(t).empty]
+    fieldable = [t for t in t_stats['Team Name'] if roster_size(t)]
     if len(fieldable) < 2:
         st.info("Need at least two teams with logged player games.")
     else:
@@ -3091,7 +4550,10 @@ elif view_mode == "🔮 Oracle Predictor":
         else:
             with st.expander("⚙️ Simulation Settings", expanded=True):
                 sc1, sc2, sc3, sc4 = st.columns(4)
-                n_sims = sc1.select_slider("Simulations", [500, 1000, 2500, 5000, 10000], value=2500)
+                n_sims = sc1.select_slider("Simulations", [500, 1000, 2500, 5000, 10000, 100000, 1000000],
+                                           value=2500, help="Past 10,000 the run is played in fixed seeded chunks"
+                                           + (f", split across {ORACLE_WORKERS} worker processes."
+                                              if ORACLE_WORKERS > 1 else "."))
                 hca = sc2.slider("Home court edge (pts)", 0.0, 5.0, 1.5, 0.5)
                 variance = sc3.slider("Chaos multiplier", 0.5, 2.0, 1.0, 0.1,
                                       help="Scales game-to-game score variance. 2.0 = anything can happen.")
@@ -3099,11 +4561,16 @@ elif view_mode == "🔮 Oracle Predictor":
                                        help="High = the star always eats. Low = points spread randomly.")
 
 
-                ec1, ec2 = st.columns(2)
+                ec1, ec2, ec3 = st.columns([2, 2, 1])
                 r1_full = full_roster(t1_sel)['Player/Team'].tolist()
                 r2_full = full_roster(t2_sel)['Player/Team'].tolist()
                 out1 = ec1.multiselect(f"🚑 Scratches — {t1_sel}", r1_full, key="out1")
                 out2 = ec2.multiselect(f"🚑 Scratches — {t2_sel}", r2_full, key="out2")
+                sim_seed = ec3.number_input("Seed", 0, 2 ** 31 - 1, None, step=1, key="oracle_seed",
+                                            placeholder="Random",
+                                            help="Empty = a fresh random run on every click. Pin a seed "
+                                                 "and the same settings give the same result, served "
+                                                 "from cache after the first run.")
 
 
             rot1 = get_rotation(t1_sel, exclude=out1)
@@ -3127,16 +4594,34 @@ elif view_mode == "🔮 Oracle Predictor":
                             st.warning(f"Only {len(rot)} available — shorthanded.")
 
 
+                # pinned seed: results live in the shared LRU and the session only remembers which
+                # run it last asked for; no seed: every click is a fresh draw, kept in this session only
+                pinned = sim_seed is not None
+                oracle_key = sim_key(DATA_KEY, scope_choice, game_type, t1_sel, t2_sel,
+                                     tuple(sorted(out1)), tuple(sorted(out2)),
+                                     n_sims, hca, variance, star_conc, sim_seed)
+                sim_cache = _sim_cache(DATA_KEY)
+                res = None
                 if st.button("🔮 RUN SIMULATION", type="primary", use_container_width=True):
-                    with st.spinner(f"Running {n_sims:,} games..."):
-                        res = run_monte_carlo(t1_sel, t2_sel, rot1, rot2, n_sims=n_sims, hca=hca,
-                                              star_conc=star_conc, variance=variance)
-
-
+                    res = sim_cache.get(oracle_key) if pinned else None
+                    if res is None:
+                        with st.spinner(f"Running {n_sims:,} games..."):
+                            res = compact_result(run_monte_carlo(
+                                t1_sel, t2_sel, rot1, rot2, n_sims=n_sims, hca=hca, star_conc=star_conc,
+                                variance=variance, seed=int(sim_seed) if pinned else None,
+                                workers=ORACLE_WORKERS if n_sims > 10000 else 0))
+                        if pinned:
+                            sim_cache.put(oracle_key, res)
+                    st.session_state["oracle_last"] = oracle_key
+                    st.session_state["oracle_random"] = None if pinned else res
+                elif st.session_state.get("oracle_last") == oracle_key:
+                    res = sim_cache.get(oracle_key) if pinned else st.session_state.get("oracle_random")
+
+
+                if res is not None:
                     p1, p2 = res['win1'], res['win2']
-                    med1, med2 = int(np.median(res['s1'])), int(np.median(res['s2']))
-                    spread = float(np.mean(res['margin']))
-                    total = float(np.mean(res['s1'] + res['s2']))
+                    med1, med2 = res['med1'], res['med2']
+                    spread, total = res['spread'], res['total']
                     fav = t1_sel if spread > 0 else t2_sel
 
 
@@ -3184,6 +4669,8 @@ elif view_mode == "🔮 Oracle Predictor":
 
 
                     with o_tabs[0]:
+                        if res['n'] > SIM_PLOT_CAP:   # compact_result keeps the first N sims: i.i.d., a fair sample
+                            st.caption(f"Charts show {SIM_PLOT_CAP:,} of the {res['n']:,} sims.")
                         dc1, dc2 = st.columns(2)
                         with dc1:
                             mfig = px.histogram(x=res['margin'], nbins=40, template='plotly_dark',
@@ -3204,8 +4691,7 @@ elif view_mode == "🔮 Oracle Predictor":
                             st.plotly_chart(sfig, use_container_width=True)
 
 
-                        blow = float((np.abs(res['margin']) >= 15).mean() * 100)
-                        close = float((np.abs(res['margin']) <= 5).mean() * 100)
+                        blow, close = res['blow'], res['close']
                         k1, k2, k3 = st.columns(3)
                         k1.markdown(f"<div class='line-box'><div class='line-label'>Nail-biter (≤5)</div>"
                                     f"<div class='line-value'>{close:.0f}%</div></div>", unsafe_allow_html=True)
@@ -3217,8 +4703,8 @@ elif view_mode == "🔮 Oracle Predictor":
 
 
                     with o_tabs[1]:
-                        bx1 = projected_box(rot1, res['pp1'])
-                        bx2 = projected_box(rot2, res['pp2'])
+                        bx1 = projected_box(rot1, res['box1'])
+                        bx2 = projected_box(rot2, res['box2'])
                         pc1, pc2 = st.columns(2)
                         with pc1:
                             st.markdown(f"##### {t1_sel}")
@@ -3247,6 +4733,36 @@ elif view_mode == "🔮 Oracle Predictor":
                         dl(mvp, "⬇️ MVP odds CSV", "mvp_odds.csv", "dl_mvp")
 
 
+                st.markdown("<hr>", unsafe_allow_html=True)
+                st.markdown("#### 🗓️ Slate Simulator")
+                st.caption("Several games — or every pairing — in one batched run. Uses the settings above; "
+                           "the scratches above carry over to their teams.")
+                slate_mode = st.radio("Slate", ["Round-robin (every pairing)", "Pick games"],
+                                      horizontal=True, key="slate_mode")
+                if slate_mode == "Pick games":
+                    game_opts = [f"{h} vs {a}" for h in team_names for a in team_names if h != a]
+                    picked = st.multiselect("Games (home vs away)", game_opts, key="slate_games")
+                    slate = [tuple(g.split(" vs ", 1)) for g in picked]
+                else:
+                    slate = [(h, a) for i, h in enumerate(team_names) for a in team_names[i + 1:]]
+                if slate and st.button(f"🗓️ SIMULATE {len(slate)} GAMES", use_container_width=True):
+                    slate_sims = min(n_sims, 10000)   # the slate is single-process: cap it at the in-process range
+                    with st.spinner(f"Running {len(slate):,} games × {slate_sims:,} sims..."):
+                        sres = simulate_slate(slate, n_sims=slate_sims, hca=hca, star_conc=star_conc,
+                                              variance=variance, rotations={t1_sel: rot1, t2_sel: rot2})
+                    board = sres['games']
+                    top_mvp = sres['mvp'].drop_duplicates('Game').set_index('Game')
+                    board['ML Home'] = [american_odds(p / 100) for p in board['Home Win %']]
+                    board['ML Away'] = [american_odds(p / 100) for p in board['Away Win %']]
+                    board['Likely MVP'] = top_mvp['Player'].reindex(board.index).to_numpy()
+                    st.dataframe(board, use_container_width=True, hide_index=True)
+                    dl(board, "⬇️ Slate CSV", "slate.csv", "dl_slate")
+                    with st.expander("🏆 MVP odds by game"):
+                        smvp = sres['mvp'].copy(deep=False)
+                        smvp['Game'] = (board['Home'] + " vs " + board['Away']).to_numpy()[smvp['Game']]
+                        st.dataframe(smvp, use_container_width=True, hide_index=True)
+
+
 
 
 # ------------------------------------------------------------ LEAGUE TEAMS ---
@@ -3264,7 +4780,7 @@ elif view_mode == "\U0001f6e1\ufe0f League Teams":
 
 
     rec = {r['Team Name']: (int(r['Wins']), int(r['GP'] - r['Wins'])) for _, r in t_stats.iterrows()}
-    roster_ct = p_stats.groupby('Team')['Player/Team'].nunique().to_dict()
+    roster_ct = p_stats.groupby('Team', observed=True)['Player/Team'].nunique().to_dict()
 
 
     st.markdown(f"#### {len(all_teams)} teams")
@@ -3320,9 +4836,9 @@ elif view_mode == "\U0001f4c8 Card Market":
 
     market = _load_market()
     rows = []
-    for _, r in p_stats.iterrows():
+    tiers, colors = card_rarities(p_stats['Player/Team'])
+    for (_, r), tier, col in zip(p_stats.iterrows(), tiers, colors):
         pl = r['Player/Team']
-        tier, col = card_rarity(pl)
         m = market.get(pl)
         if m:  # bot is the source of truth for serialized cards
             tier = m.get("tier", tier)
@@ -3334,7 +4850,7 @@ elif view_mode == "\U0001f4c8 Card Market":
             run = RARITY_SUPPLY.get(tier, 0)
             stock = "∞" if run == 0 else str(run)
         rows.append({"Player": pl, "Team": r['Team'], "Tier": tier, "Color": col,
-                     "Stat": _career_ratings().get(pl, 0.0), "Pop": player_popularity(pl),
+                     "Stat": _career_ratings(DATA_KEY).get(pl, 0.0), "Pop": player_popularity(pl),
                      "Price": player_price(pl, w_stat, w_pop),
                      "Stock": stock, "Form": player_form(pl)})
     mk = pd.DataFrame(rows)
@@ -3471,10 +4987,10 @@ elif view_mode == "\U0001f3b4 Qwiks TCG":
     lc = st.columns(3)
     for role, col in zip(["Guard", "Forward", "Big"], lc):
         with col:
-            board = p_stats.copy()
+            board = p_stats.copy(deep=False)
             board['FP'] = board.apply(lambda rr: fantasy_points(rr, role), axis=1)
-            board['Cost'] = board['Player/Team'].apply(lambda n: card_cost(card_rarity(n)[0]))
-            board['Arch'] = board['Player/Team'].apply(player_archetype)
+            board['Cost'] = [card_cost(t) for t in card_rarities(board['Player/Team'])[0]]
+            board['Arch'] = player_archetypes(board['Player/Team'])
             board = board.sort_values('FP', ascending=False).head(depth)
             html = (f"<div style='background:#1c2128;padding:12px;border-radius:8px;border-left:4px solid {GOLD};'>"
                     f"<h4 style='color:#fff;margin-top:0;text-transform:uppercase;'>{role}</h4>")
@@ -3799,7 +5315,7 @@ elif view_mode == "🔬 Advanced Analytics Lab":
 # ---------------------------------------------------------------- VAULT ------
 elif view_mode == "🏦 The Vault":
     st.subheader("🏦 THE VAULT — Master Ledger & Hall of Fame")
-    p_tot = p_df.groupby('Player/Team').sum(numeric_only=True).reset_index()
+    p_tot = p_df.groupby('Player/Team', observed=True).sum(numeric_only=True).reset_index()
 
 
     st.markdown("### 🏆 Hall of Fame Podiums")
@@ -3867,7 +5383,7 @@ elif view_mode == "📖 Record Book & Milestones":
 
 
     with tab_miles:
-        p_totals = p_df.groupby('Player/Team').sum(numeric_only=True).reset_index()
+        p_totals = p_df.groupby('Player/Team', observed=True).sum(numeric_only=True).reset_index()
         mc1, mc2, mc3 = st.columns(3)
         mc1.markdown(generate_mini_leaderboard("Total Points", p_totals, 'PTS', "#cc0000", 10, "Player/Team"), unsafe_allow_html=True)
         mc2.markdown(generate_mini_leaderboard("Total Rebounds", p_totals, 'REB', "#32cd32", 10, "Player/Team"), unsafe_allow_html=True)
@@ -3879,12 +5395,12 @@ elif view_mode == "📖 Record Book & Milestones":
 
 
         st.markdown("### 🎖️ Club Memberships")
-        clubbed = p_stats[p_stats['Clubs'].apply(len) > 0]
+        clubbed = p_stats[club_count(p_stats['Clubs']) > 0]
         if clubbed.empty:
             st.info("No club memberships earned yet.")
         else:
             for _, r in clubbed.iterrows():
-                chips = "".join([f"<span class='chip'>{c}</span>" for c in r['Clubs']])
+                chips = "".join([f"<span class='chip'>{c}</span>" for c in club_names(r['Clubs'])])
                 st.markdown(f"<div style='background:#161b22; padding:10px; border-left:3px solid {GOLD}; "
                             f"margin-bottom:6px;'><b style='color:#fff;'>{r['Player/Team']}</b> "
                             f"<span style='color:#888;'>({r['Team']})</span><br>{chips}</div>",
@@ -3892,7 +5408,7 @@ elif view_mode == "📖 Record Book & Milestones":
 
 
     with tab_team:
-        t_totals = t_df.groupby('Team Name').sum(numeric_only=True).reset_index()
+        t_totals = t_df.groupby('Team Name', observed=True).sum(numeric_only=True).reset_index()
         if t_totals.empty:
             st.info("No team totals in scope.")
         else:
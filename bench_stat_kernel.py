@@ -0,0 +1,80 @@
+"""
+Benchmark: stat_kernel.group_reduce vs the per-statistic pandas groupbys it replaced in
+compute_stats, on a synthetic 50-season league. Run with `python bench_stat_kernel.py`.
+"""
+
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from stat_kernel import group_reduce
+
+
+SEASONS, GAMES, PLAYERS, PER_SIDE = 50, 120, 400, 5
+STATS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'TO', 'FGM', 'FGA', '3PM', '3PA']
+
+
+
+
+def synthetic_league(seed=0):
+    """One row per player per game: SEASONS x GAMES games, two sides of PER_SIDE players."""
+    rng = np.random.default_rng(seed)
+    n = SEASONS * GAMES * 2 * PER_SIDE
+    gid = np.repeat(np.arange(SEASONS * GAMES), 2 * PER_SIDE)
+    df = pd.DataFrame({'PID': rng.integers(0, PLAYERS, n), 'GID': gid,
+                       'TID': rng.integers(0, 16, n), 'Win': rng.integers(0, 2, n).astype(np.int8)})
+    for c in STATS:
+        df[c] = rng.poisson(6, n).astype(np.int16)
+    df.loc[rng.random(n) < 0.05, '3PA'] = np.nan   # nullable column, like the sheet's blanks
+    return df
+
+
+def pandas_passes(df):
+    """The old shape: one hashed groupby per statistic family, then merged back together."""
+    g = df.groupby('PID')
+    means = g[STATS].mean()
+    highs = g[['PTS', 'REB', 'AST']].max().add_prefix('High_')
+    at_highs = df.groupby('PID')[['PTS', 'REB', 'AST']].max().add_prefix('AT_High_')
+    gp = g['GID'].nunique().rename('GP')
+    wins = g['Win'].sum().rename('Wins')
+    team = df.groupby('PID')['TID'].last().rename('TID')
+    out = means.join(gp).join(wins).reset_index()
+    out = out.merge(highs.reset_index(), on='PID').merge(at_highs.reset_index(), on='PID')
+    return out.merge(team.reset_index(), on='PID')
+
+
+def kernel_pass(df):
+    """The same columns from one sort and one reduceat per column."""
+    agg = group_reduce(df['PID'].to_numpy(), df, sums=STATS + ['Win'], counts=STATS,
+                       maxes=['PTS', 'REB', 'AST'], distinct=df['GID'].to_numpy(), last=['TID'])
+    out = pd.DataFrame({c: agg[c] / agg[c + '_n'] for c in STATS})
+    out['GP'] = agg['n_distinct']
+    out['Wins'] = agg['Win']
+    for c in ['PTS', 'REB', 'AST']:
+        out['High_' + c] = out['AT_High_' + c] = agg[c + '_max']
+    out['TID'] = agg['TID_last']
+    return out.rename_axis('PID').reset_index()
+
+
+def best_of(fn, df, repeat=5):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+
+
+if __name__ == '__main__':
+    df = synthetic_league()
+    a, b = pandas_passes(df), kernel_pass(df)
+    pd.testing.assert_frame_equal(a[b.columns], b, check_dtype=False)
+    base, fast = best_of(pandas_passes, df), best_of(kernel_pass, df)
+    print(f"{len(df):,} rows, {SEASONS} seasons, {df['PID'].nunique()} players")
+    print(f"pandas groupbys + merges  {base:8.1f} ms")
+    print(f"group_reduce              {fast:8.1f} ms")
+    print(f"speedup                   {base / fast:8.2f}x")
@@ -0,0 +1,113 @@
+"""
+Game draws for the QCL Oracle (app.py, Section 9), runnable across a process pool.
+
+play_games is run_monte_carlo's per-game draw — team scores, overtime, Dirichlet
+scoring shares, MVP — on plain arrays. play_games_pooled splits a large run into
+fixed-size chunks, each seeded from its own np.random.SeedSequence(seed).spawn(...)
+child, so a seed gives the same sims no matter how many workers play the chunks.
+No Streamlit in here: spawned workers import only this module and numpy.
+"""
+
+
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+import numpy as np
+
+
+CHUNK_SIMS = 50_000   # sims per chunk; the chunking, not the worker count, fixes the streams
+
+
+
+
+def draw_scores(rng, exp1, exp2, sd1, sd2, size):
+    """Integer team scores (floor 25) of `size` simulated games, ties settled by an overtime
+    coin-flip bucket. Parameters broadcast against `size`, e.g. (pairs, 1) vs (pairs, sims)."""
+    s1 = np.rint(rng.normal(exp1, sd1, size)).astype(int)
+    s2 = np.rint(rng.normal(exp2, sd2, size)).astype(int)
+    s1 = np.clip(s1, 25, None)
+    s2 = np.clip(s2, 25, None)
+
+
+    tie = s1 == s2
+    if tie.any():
+        flip = rng.random(int(tie.sum())) < 0.5
+        bump = rng.integers(2, 7, int(tie.sum()))
+        s1[tie] = s1[tie] + np.where(flip, bump, 0)
+        s2[tie] = s2[tie] + np.where(flip, 0, bump)
+    return s1, s2
+
+
+
+
+def play_games(rng, n_sims, exp1, exp2, sd1, sd2, alpha1, alpha2, impact1, impact2):
+    """`n_sims` games of one matchup. alpha* are the five-man Dirichlet concentrations,
+    impact* the baseline MVP impact per player. Returns team scores s1 / s2, player points
+    pp1 / pp2 (sims x players) and MVP counts over the players of both sides."""
+    s1, s2 = draw_scores(rng, exp1, exp2, sd1, sd2, n_sims)
+    w1 = s1 > s2
+    pp1 = rng.dirichlet(alpha1, size=n_sims) * s1[:, None]
+    pp2 = rng.dirichlet(alpha2, size=n_sims) * s2[:, None]
+    m1 = pp1 + np.asarray(impact1)[None, :] + np.where(w1, 4.0, 0.0)[:, None]
+    m2 = pp2 + np.asarray(impact2)[None, :] + np.where(~w1, 4.0, 0.0)[:, None]
+    mvp = np.bincount(np.hstack([m1, m2]).argmax(axis=1), minlength=len(alpha1) + len(alpha2))
+    return {'s1': s1, 's2': s2, 'pp1': pp1, 'pp2': pp2, 'mvp_counts': mvp}
+
+
+
+
+def _play_chunk(args):
+    n_sims, seed_seq, params = args
+    return play_games(np.random.default_rng(seed_seq), n_sims, **params)
+
+
+
+
+@contextmanager
+def _worker_main():
+    """Spawned workers re-import the parent's __main__, which under Streamlit is the app script.
+    While workers start, point __main__ at this module instead."""
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+
+
+def _ready():
+    return True
+
+
+
+
+def start_pool(workers):
+    """A spawn-context ProcessPoolExecutor with all `workers` processes already running.
+    The pool would otherwise start them lazily, one per submit, each needing the __main__
+    swap; starting them here keeps the swap to this one call."""
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    with _worker_main():
+        wait([executor.submit(_ready) for _ in range(workers)])
+    return executor
+
+
+
+
+def play_games_pooled(params, n_sims, seed=None, executor=None, chunk=CHUNK_SIMS):
+    """play_games over `n_sims` in chunks of `chunk`, chunk i drawn from child i of
+    SeedSequence(seed). `executor` (see start_pool) plays them in parallel;
+    without one they run in-process. Either way the merged result is identical."""
+    sizes = [chunk] * (n_sims // chunk) + ([n_sims % chunk] if n_sims % chunk else [])
+    jobs = [(n, ss, params) for n, ss in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))]
+    if executor is None:
+        parts = [_play_chunk(j) for j in jobs]
+    else:
+        futures = [executor.submit(_play_chunk, j) for j in jobs]
+        parts = [f.result() for f in futures]
+    out = {k: np.concatenate([p[k] for p in parts]) for k in ('s1', 's2', 'pp1', 'pp2')}
+    out['mvp_counts'] = np.sum([p['mvp_counts'] for p in parts], axis=0)
+    return out
@@ -0,0 +1,138 @@
+"""
+Conditional reads of the QCL league sheet, and the background feed app.py serves from.
+
+SheetSource keeps the validators of its last good read: ETag / Last-Modified for an
+http(s) URL, mtime + size for a local CSV. It sends them back on the next read, so an
+unchanged sheet costs a 304 (or an os.stat) instead of a download and a rebuild.
+SheetFeed polls a SheetSource and swaps in each rebuilt snapshot; the build itself is
+passed in (app.py, Section 3, _league_build). No Streamlit in here, so both can be
+imported (and tested) on their own.
+"""
+
+
+import os
+import re
+import threading
+import time
+
+import requests
+
+
+
+
+class SheetSource:
+    """The league sheet at `src` (http(s) URL or local CSV path), read only when it changed."""
+
+    def __init__(self, src, timeout=20):
+        self.src = src
+        self.timeout = timeout
+        self.etag = None
+        self.modified = None   # Last-Modified header, or "mtime_ns-size" for a file
+
+    def fetch(self, have_copy=True):
+        """Sheet bytes, or None if the source says it hasn't changed. Validators are only
+        sent when `have_copy`, i.e. when the caller has earlier bytes to fall back on."""
+        if re.match(r'^https?://', str(self.src)):
+            headers = {}
+            if have_copy:
+                if self.etag:
+                    headers["If-None-Match"] = self.etag
+                if self.modified:
+                    headers["If-Modified-Since"] = self.modified
+            r = requests.get(self.src, headers=headers, timeout=self.timeout)
+            if r.status_code == 304:
+                return None
+            r.raise_for_status()
+            self.etag = r.headers.get("ETag")
+            self.modified = r.headers.get("Last-Modified")
+            return r.content
+        info = os.stat(self.src)
+        stamp = f"{info.st_mtime_ns}-{info.st_size}"
+        if have_copy and stamp == self.modified:
+            return None
+        self.modified = stamp
+        with open(self.src, "rb") as fh:
+            return fh.read()
+
+    def forget(self):
+        """Drop the validators: the next fetch downloads the sheet whatever it says."""
+        self.etag = self.modified = None
+
+
+
+
+class SheetFeed:
+    """Process-wide league snapshot, kept fresh by a background poller.
+
+    The poller reads the sheet through a SheetSource (If-None-Match / If-Modified-Since,
+    file mtime for a local path), rebuilds off the request path only when the content
+    key changes, and swaps the finished snapshot in with one reference assignment.
+    Readers always get the last good snapshot immediately; a failed fetch or build
+    keeps it and is reported through last_error / status().
+
+    `build(sheet_raw, key, cache)` returns None if the sheet's content key is still
+    `key`, else (new key, snapshot dict). `cache` is one dict kept across builds."""
+
+    def __init__(self, src, build, interval=60):
+        self.src = src
+        self.interval = max(int(interval), 5)
+        self._build = build
+        self._snap = None
+        self._key = None
+        self._sheet_raw = None
+        self._stages = {}   # build's cache: unchanged stages are reused across rebuilds
+        self._source = SheetSource(src)
+        self._build_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.last_check = None
+        self.last_status = "never checked"
+        self.last_error = None
+
+    def refresh(self):
+        """One poll: fetch, and rebuild + swap only if the content actually changed."""
+        with self._build_lock:
+            self.last_check = time.time()
+            try:
+                fetched = self._source.fetch(have_copy=self._sheet_raw is not None)
+                sheet_raw = fetched if fetched is not None else self._sheet_raw
+                built = self._build(sheet_raw, self._key, self._stages)
+                if built is None:
+                    self.last_status = "not modified" if fetched is None else "unchanged"
+                    return
+                key, out = built
+                self._snap, self._key, self._sheet_raw = dict(out, key=key), key, sheet_raw
+                self.last_status = "updated"
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.last_status = "error"
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.refresh()
+
+    def snapshot(self):
+        """Last good snapshot (blocking only for the very first build), or None."""
+        if self._snap is None:
+            self.refresh()
+        with self._start_lock:   # sessions call this concurrently: start one poller, not one each
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="qcl-sheet-feed", daemon=True)
+                self._thread.start()
+        return self._snap
+
+    def refresh_now(self):
+        """Skip the validators and re-check right now (the sidebar Refresh button)."""
+        self._source.forget()
+        self.refresh()
+
+    def status(self):
+        if self.last_check is None:
+            return "Sheet not checked yet."
+        age = int(time.time() - self.last_check)
+        msg = f"Sheet checked {age}s ago ({self.last_status}) • polling every {self.interval}s"
+        return msg + (f" • last error: {self.last_error}" if self.last_error else "")
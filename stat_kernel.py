@@ -0,0 +1,113 @@
+"""
+Single-pass grouped reductions for the QCL stat engine (app.py, Section 8).
+
+One stable sort by the group key, then every per-group sum, non-null count, sum of
+squares, max, distinct count and last value comes out of one np.add.reduceat /
+np.maximum.reduceat per column over the sorted rows — instead of one hashed groupby
+per statistic. No Streamlit in here, so it can be imported (and benchmarked) on its own.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+
+
+def group_reduce(keys, frame, sums=(), counts=(), sumsq=(), maxes=(), distinct=None, last=()):
+    """Per-group reductions of `frame`'s columns over integer `keys` (one per row).
+
+    Returns a DataFrame indexed by the sorted unique keys, with columns (in this order):
+        c         for c in sums    sum, NaN skipped (integer sources stay int64)
+        c + '_sq' for c in sumsq   sum of squares, NaN skipped
+        c + '_n'  for c in counts  non-null count
+        c + '_max' for c in maxes  max, NaN skipped (integer sources stay int64)
+        'n_rows'                   rows
+        'n_distinct'               distinct values of `distinct` (only if given)
+        c + '_last' for c in last  value on the group's last row, in input order
+    """
+    keys = np.asarray(keys)
+    distinct = None if distinct is None else np.asarray(distinct)
+    if distinct is None:
+        order = np.argsort(keys, kind='stable')
+    else:
+        order = np.lexsort((distinct, keys))   # key, then game: distinct values become runs
+    k = keys[order]
+    if not len(k):
+        return _empty(k, frame, sums, counts, sumsq, maxes, distinct, last)
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    n_rows = np.diff(np.r_[starts, len(k)])
+    out = {}
+
+
+    cache = {}
+    def column(c):   # sorted values, and their NaN mask (None when the column has no NaN)
+        if c not in cache:
+            v = _values(frame[c])[order]
+            nan = np.isnan(v) if v.dtype.kind == 'f' else None
+            cache[c] = (v, nan if nan is not None and nan.any() else None)
+        return cache[c]
+
+    for c in sums:
+        v, nan = column(c)
+        if v.dtype.kind == 'f':
+            out[c] = np.add.reduceat(np.where(nan, 0.0, v) if nan is not None else v, starts)
+        else:
+            out[c] = np.add.reduceat(v, starts, dtype=np.int64)
+    for c in sumsq:
+        v, nan = column(c)
+        v = v.astype(np.float64)
+        out[c + '_sq'] = np.add.reduceat(np.where(nan, 0.0, v * v) if nan is not None else v * v, starts)
+    for c in counts:
+        v, nan = column(c)
+        out[c + '_n'] = (np.add.reduceat(~nan, starts, dtype=np.int64) if nan is not None
+                         else n_rows)
+    for c in maxes:
+        v, _ = column(c)
+        out[c + '_max'] = (np.fmax.reduceat(v, starts) if v.dtype.kind == 'f'
+                           else np.maximum.reduceat(v, starts).astype(np.int64))
+
+
+    out['n_rows'] = n_rows
+    if distinct is not None:
+        d = distinct[order]
+        new_value = np.r_[True, (k[1:] != k[:-1]) | (d[1:] != d[:-1])]
+        out['n_distinct'] = np.add.reduceat(new_value, starts, dtype=np.int64)
+    if last:
+        at = np.maximum.reduceat(order, starts)   # latest input row of each group
+        for c in last:
+            out[c + '_last'] = frame[c].to_numpy()[at]
+    return pd.DataFrame(out, index=pd.Index(k[starts], name='key'))
+
+
+
+
+def _values(s):
+    """A column as a plain numpy array; pandas' nullable dtypes become float64 with NaN."""
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in 'iubf':
+        return s.to_numpy()
+    return s.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+
+
+def _empty(k, frame, sums, counts, sumsq, maxes, distinct, last):
+    """group_reduce's frame for zero rows, with the same columns and dtypes."""
+    num = lambda c: np.int64 if frame[c].dtype.kind in 'iub' else np.float64
+    out = {**{c: np.empty(0, num(c)) for c in sums}, **{c + '_sq': np.empty(0) for c in sumsq},
+           **{c + '_n': np.empty(0, np.int64) for c in counts}, **{c + '_max': np.empty(0, num(c)) for c in maxes},
+           'n_rows': np.empty(0, np.int64)}
+    if distinct is not None:
+        out['n_distinct'] = np.empty(0, np.int64)
+    out.update({c + '_last': frame[c].to_numpy()[:0] for c in last})
+    return pd.DataFrame(out, index=pd.Index(k, name='key'))
+
+
+
+
+def sample_sd(s, sq, n):
+    """Sample standard deviation (ddof=1) from sum, sum of squares and count; NaN when n < 2."""
+    s, sq, n = (np.asarray(a, dtype=np.float64) for a in (s, sq, n))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (sq - s * s / n) / (n - 1)
+    return np.where(n > 1, np.sqrt(np.clip(var, 0, None)), np.nan)
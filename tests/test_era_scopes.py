@@ -0,0 +1,95 @@
+"""Career (QCL) / Career (SPAM) from the stat cube against the row-level Era filter they
+replaced: the whole app runs under Streamlit's AppTest on a sheet built from the bundled
+history, with one game's team totals left out so they have to be rebuilt."""
+
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+
+
+def _era_scopes(app):
+    """Runs as the AppTest script: the app, then every era scope both ways."""
+    import runpy
+
+    import pandas as pd
+    import streamlit as st
+
+    g = runpy.run_path(app, run_name="__main__")
+    full_df = g['full_df']
+    diffs = {}
+    for scope, era in (("Career (QCL)", "QCL"), ("Career (SPAM)", "SPAM")):
+        for game_type in ("All Games", "Regular Season", "Playoffs"):
+            rows = full_df[full_df['Era'] == era]
+            if game_type != "All Games":
+                rows = rows[rows['Game_Type'] == game_type]
+            want = g['compute_stats'](rows, 0)
+            got = g['scope_stats'](g['scope_game_mask'](scope, game_type))
+            cell = f"{scope} / {game_type}"
+            diffs[cell] = ""
+            if want is None or got is None:
+                diffs[cell] = "" if want is got else "one side is empty"
+                continue
+            for frame, name in (('p_stats', 'Player/Team'), ('t_stats', 'Team Name')):
+                a = want[frame].sort_values(name, ignore_index=True)
+                b = got[frame].sort_values(name, ignore_index=True)[list(a.columns)]
+                try:
+                    pd.testing.assert_frame_equal(a, b, check_dtype=False, rtol=1e-6)
+                except AssertionError as e:
+                    diffs[cell] += f"{frame}: {e}\n"
+    st.session_state['era_diffs'] = diffs
+    st.session_state['team_rows_without_era'] = int(full_df.loc[full_df['Type'] == 'Team', 'Era'].isna().sum())
+
+
+
+
+class EraScopeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        hist = pd.read_csv(os.path.join(ROOT, "SPAM_Raw_Data_v2.csv"))
+        sheet = hist[hist['Season'].isin([5, 6])].assign(Season=lambda d: d['Season'] - 4)
+        is_team = sheet['Type'].astype(str).str.strip().str.lower() != 'player'
+        first = sheet.loc[is_team, ['Season', 'Game_ID']].iloc[0]
+        rebuilt = is_team & (sheet['Season'] == first['Season']) & (sheet['Game_ID'] == first['Game_ID'])
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.tmp.name, "qcl.csv")
+        sheet[~rebuilt].to_csv(path, index=False)
+        cls.env = os.environ.get("QCL_CSV_URL")
+        os.environ["QCL_CSV_URL"] = path
+        cls.at = AppTest.from_function(_era_scopes, args=(os.path.join(ROOT, "app.py"),), default_timeout=600)
+        cls.at.run()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.env is None:
+            os.environ.pop("QCL_CSV_URL", None)
+        else:
+            os.environ["QCL_CSV_URL"] = cls.env
+        cls.tmp.cleanup()
+
+    def test_app_ran(self):
+        self.assertEqual([e.value for e in self.at.exception], [])
+        self.assertIn('era_diffs', self.at.session_state)
+
+    def test_rebuilt_team_totals_keep_their_era(self):
+        self.assertEqual(self.at.session_state['team_rows_without_era'], 0)
+
+    def test_cube_matches_era_row_filter(self):
+        diffs = self.at.session_state['era_diffs']
+        self.assertTrue(diffs)
+        self.assertEqual({k: v for k, v in diffs.items() if v}, {})
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+"""SheetSource's conditional reads and SheetFeed's rebuild / swap / fallback, against a
+local http.server: 200 with an ETag, 304 when unchanged, 500 on demand."""
+
+
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sheet_source import SheetFeed, SheetSource
+
+
+
+
+class _Sheet(BaseHTTPRequestHandler):
+    """Serves server.body with a content-hash ETag; answers 304 to a matching If-None-Match,
+    and server.fail (an HTTP status) instead while that is set."""
+
+    def do_GET(self):
+        srv = self.server
+        srv.seen.append(dict(self.headers))
+        if getattr(srv, "fail", None):
+            self.send_error(srv.fail)
+            return
+        etag = '"%s"' % hashlib.sha256(srv.body).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(srv.body)))
+        self.end_headers()
+        self.wfile.write(srv.body)
+
+    def log_message(self, *args):
+        pass
+
+
+
+
+class SheetSourceHTTPTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Sheet)
+        self.server.body, self.server.seen = b"Season,Game_ID\n1,1\n", []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.source = SheetSource(f"http://127.0.0.1:{self.server.server_port}/qcl.csv")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_unchanged_sheet_is_a_304(self):
+        self.assertEqual(self.source.fetch(have_copy=False), self.server.body)
+        etag = self.source.etag
+        self.assertIsNotNone(etag)
+        self.assertIsNone(self.source.fetch())
+        self.assertEqual(self.server.seen[-1].get("If-None-Match"), etag)
+        self.assertEqual(self.source.etag, etag)
+
+    def test_changed_sheet_is_downloaded(self):
+        self.source.fetch(have_copy=False)
+        old = self.source.etag
+        self.server.body = b"Season,Game_ID\n1,1\n1,2\n"
+        self.assertEqual(self.source.fetch(), self.server.body)
+        self.assertNotEqual(self.source.etag, old)
+        self.assertIsNone(self.source.fetch())
+
+    def test_no_validators_without_a_copy(self):
+        self.source.fetch(have_copy=False)
+        self.assertEqual(self.source.fetch(have_copy=False), self.server.body)
+        self.assertNotIn("If-None-Match", self.server.seen[-1])
+
+    def test_forget_forces_a_download(self):
+        self.source.fetch(have_copy=False)
+        self.source.forget()
+        self.assertEqual(self.source.fetch(), self.server.body)
+        self.assertNotIn("If-None-Match", self.server.seen[-1])
+
+
+
+
+class _Build:
+    """A SheetFeed build step that keys a sheet by its bytes and counts real builds.
+    `fail` makes the next builds raise; `gate`, when set, holds a build until released."""
+
+    def __init__(self):
+        self.builds, self.fail, self.gate, self.started = 0, False, None, threading.Event()
+
+    def __call__(self, sheet_raw, key, cache):
+        new_key = hashlib.sha256(sheet_raw).hexdigest()
+        if new_key == key:
+            return None
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise ValueError("bad sheet")
+        self.builds += 1
+        return new_key, {'rows': sheet_raw.count(b"\n") - 1}
+
+
+
+
+class SheetFeedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Sheet)
+        self.server.body, self.server.seen = b"Season,Game_ID\n1,1\n", []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.build = _Build()
+        self.feed = SheetFeed(f"http://127.0.0.1:{self.server.server_port}/qcl.csv", self.build)
+
+    def test_builds_then_304s(self):
+        self.feed.refresh()
+        first = self.feed._snap
+        self.assertEqual((self.feed.last_status, first['rows'], self.build.builds), ("updated", 1, 1))
+        self.feed.refresh()
+        self.assertEqual((self.feed.last_status, self.build.builds), ("not modified", 1))
+        self.assertIs(self.feed._snap, first)
+
+    def test_changed_sheet_swaps_the_snapshot(self):
+        self.feed.refresh()
+        old = self.feed._snap
+        self.server.body = b"Season,Game_ID\n1,1\n1,2\n"
+        self.feed.refresh()
+        self.assertEqual((self.feed.last_status, self.feed._snap['rows'], old['rows']), ("updated", 2, 1))
+        self.assertNotEqual(self.feed._snap['key'], old['key'])
+
+    def test_failed_fetch_keeps_the_last_snapshot(self):
+        self.feed.refresh()
+        good = self.feed._snap
+        self.server.fail = 500
+        self.feed.refresh_now()
+        self.assertEqual(self.feed.last_status, "error")
+        self.assertIn("500", self.feed.last_error)
+        self.assertIs(self.feed._snap, good)
+        self.server.fail = None
+        self.server.body = b"Season,Game_ID\n1,1\n1,2\n"
+        self.feed.refresh()
+        self.assertEqual((self.feed.last_status, self.feed.last_error, self.feed._snap['rows']), ("updated", None, 2))
+
+    def test_failed_build_keeps_the_last_snapshot(self):
+        self.feed.refresh()
+        good = self.feed._snap
+        self.server.body = b"Season,Game_ID\n1,1\n1,2\n"
+        self.build.fail = True
+        self.feed.refresh()
+        self.assertEqual(self.feed.last_status, "error")
+        self.assertIn("bad sheet", self.feed.last_error)
+        self.assertIs(self.feed._snap, good)
+
+    def test_unreachable_sheet_keeps_the_last_snapshot(self):
+        self.feed.refresh()
+        good = self.feed._snap
+        self.doCleanups()   # server down
+        self.feed.refresh_now()
+        self.assertEqual(self.feed.last_status, "error")
+        self.assertIn("ConnectionError", self.feed.last_error)
+        self.assertIs(self.feed._snap, good)
+
+    def test_readers_get_the_old_snapshot_during_a_rebuild(self):
+        self.feed.refresh()
+        old = self.feed._snap
+        self.server.body = b"Season,Game_ID\n1,1\n1,2\n"
+        self.build.gate, self.build.started = threading.Event(), threading.Event()
+        rebuild = threading.Thread(target=self.feed.refresh)
+        rebuild.start()
+        self.assertTrue(self.build.started.wait(5))
+        self.assertIs(self.feed.snapshot(), old)   # no waiting on the build lock
+        second = threading.Thread(target=self.feed.refresh)   # queues behind the running rebuild
+        second.start()
+        self.build.gate.set()
+        rebuild.join(5)
+        second.join(5)
+        self.assertEqual((self.build.builds, self.feed._snap['rows']), (2, 2))
+        self.assertEqual(self.feed.last_status, "not modified")
+
+
+
+
+class SheetSourceFileTest(unittest.TestCase):
+
+    def test_local_file_uses_mtime_and_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "qcl.csv")
+            with open(path, "wb") as fh:
+                fh.write(b"Season\n1\n")
+            source = SheetSource(path)
+            self.assertEqual(source.fetch(have_copy=False), b"Season\n1\n")
+            self.assertIsNone(source.fetch())
+            with open(path, "ab") as fh:
+                fh.write(b"2\n")
+            self.assertEqual(source.fetch(), b"Season\n1\n2\n")
+
+
+
+
+if __name__ == "__main__":
+    unittest.main()